@@ -1,25 +1,55 @@
 # app.py (Final Streaming-Ready Version with URL & OPTIONS fix)
 import os
-import asyncio
+import json
 import secrets
 import traceback
-import math
+import time
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 from urllib.parse import quote  # ===== ADD =====
 
-from pyrogram import Client, filters, enums, raw
+from pyrogram import Client, filters, enums
+from pyrogram.errors import MessageNotModified
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
-from pyrogram.errors import UserNotParticipant
-from pyrogram.session import Session, Auth
-from pyrogram.file_id import FileId
 
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, Response
 from fastapi.templating import Jinja2Templates
 
 from config import Config
 from database import db
+from jobs import jobs
+import metrics
+from streaming import (
+    work_loads,
+    inflight_bytes,
+    flood_until,
+    class_cache,
+    shared_load,
+    chunk_cache,
+    part_flights,
+    acquire_bot_lock,
+    setup_crypto_executor,
+    start_clients,
+    stop_clients,
+    prewarm_media_sessions,
+    SingleFlight,
+    acquire_streamer,
+    serve_media,
+    options_response,
+    index_file,
+    get_index,
+    pinned,
+    hls_playlist,
+    hls_init,
+    hls_segment,
+    hls_supported,
+    hls_unsupported_audio,
+    sign_link,
+    verify_link,
+    scheduler,
+)
 
 # ==============================================
 # SETUP
@@ -31,32 +61,46 @@ bot = Client(
     bot_token=Config.BOT_TOKEN,
     in_memory=True,
 )
-multi_clients = {}
-work_loads = {}
-class_cache = {}
+bot_lock = None
 
 templates = Jinja2Templates(directory="templates")
-app = FastAPI()
-app.add_middleware(
-    CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"]
-)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    global bot_lock
+    setup_crypto_executor()
     await db.connect()
+    if Config.WORKERS > 1:
+        shared_load.attach()
+        # bot updates sirf us worker ko milenge jisko lock mila
+        bot_lock = acquire_bot_lock(Config.BOT_LOCK_FILE)
+        if bot_lock is None:
+            bot.no_updates = True
+    chunk_cache.open(shared_load.row, Config.WORKERS)
     await bot.start()
     me = await bot.get_me()
     Config.BOT_USERNAME = me.username
-    multi_clients[0] = bot
-    work_loads[0] = 0
     print(f"✅ Bot @{Config.BOT_USERNAME} started")
+    await start_clients(bot)
+    await prewarm_media_sessions()
+    if not bot.no_updates:
+        # caption edits / DB writes wahi worker chalayega jo updates leta hai;
+        # pool + class_cache taiyaar hone ke baad, taaki index jobs streamer na banayein
+        await jobs.start()
+    if shared_load.enabled:
+        shared_load.start(Config.LOAD_SYNC_INTERVAL, inflight_bytes, work_loads, flood_until)
+        role = "bot updates + streaming" if bot_lock is not None else "streaming only"
+        print(f"✅ Worker {os.getpid()} ready ({role})")
     yield
-    if bot.is_initialized:
-        await bot.stop()
+    await jobs.stop()
+    await stop_clients()
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"]
+)
 
 # ==============================================
 # HELPERS
@@ -72,12 +116,39 @@ def sanitize_filename(name):
     return "".join(c for c in name if c.isalnum() or c in (".", "_", "-")).strip()
 
 
+def mask_filename(name):
+    """Obfuscates the filename to hide it on the page."""
+    if not name:
+        return "Protected File"
+    resolutions = ["216_p", "480p", "720p", "1080p", "2160p"]
+    res_part = ""
+    for res in resolutions:
+        if res in name:
+            res_part = f" {res}"
+            name = name.replace(res, "")
+            break
+    base, ext = os.path.splitext(name)
+    masked_base = "".join(
+        c if (i % 3 == 0 and c.isalnum()) else "*" for i, c in enumerate(base)
+    )
+    return f"{masked_base}{res_part}{ext}"
+
+
+def dl_link(mid, file_unique_id, file_size, mime_type, file_name):
+    """Signed /dl link: URL me message id nahi, aur /dl pe DB lookup nahi."""
+    token = sign_link(mid, file_unique_id, file_size, mime_type)
+    return f"{Config.BASE_URL}/dl/{token}/{quote(sanitize_filename(file_name))}"
+
+
+def show_link(link_id, mid, file_unique_id, file_size, mime_type, file_name):
+    """Watch page link; token me naam aur links doc ka _id (HLS link ke liye) bhi hai."""
+    token = sign_link(mid, file_unique_id, file_size, mime_type, file_name, link_id=link_id)
+    return f"{Config.BASE_URL}/show/{token}"
+
+
 # ==============================================
 # BOT HANDLERS (Updated for Custom Naming)
 # ==============================================
-waiting_for_name = {}
-
-
 @bot.on_message(filters.command("start") & filters.private)
 async def start_cmd(_, message: Message):
     await message.reply_text(
@@ -90,42 +161,35 @@ async def file_handler(_, message: Message):
     media = message.document or message.video or message.audio
 
     # --- ডাটাবেসে চেক ---
-    existing = await db.collection.find_one({"file_unique_id": media.file_unique_id})
+    existing = await db.find_file(media.file_unique_id)
 
     if existing:
-        u_id = existing["_id"]
         msg_id = existing["message_id"]
         f_name = existing.get("file_name", "video.mkv")
+        link_args = (
+            msg_id,
+            media.file_unique_id,
+            existing.get("file_size") or media.file_size,
+            existing.get("mime_type") or media.mime_type,
+            f_name,
+        )
 
         # এই বটের নিজস্ব লিঙ্ক তৈরি
-        my_direct_link = (
-            f"{Config.BASE_URL}/dl/{msg_id}/{quote(sanitize_filename(f_name))}"
+        my_direct_link = dl_link(*link_args)
+
+        # ক্যাপশনে লিঙ্ক যোগ করা ব্যাকগ্রাউন্ড জবে (ইউজারকে অপেক্ষা করতে হবে না)
+        storage = int(Config.STORAGE_CHANNEL)
+        await jobs.put(
+            "append_link",
+            {"chat_id": storage, "message_id": msg_id, "link": my_direct_link},
+            chat_id=storage,
         )
 
-        try:
-            # স্টোরেজ চ্যানেলের সেই মেসেজটি আনা
-            target_msg = await bot.get_messages(int(Config.STORAGE_CHANNEL), msg_id)
-            old_caption = target_msg.caption or ""
-
-            # যদি এই বটের লিঙ্ক আগে থেকে ক্যাপশনে না থাকে, তবেই আপডেট হবে
-            if Config.BASE_URL not in old_caption:
-                # আগের ক্যাপশন ঠিক রেখে নতুন লাইন যোগ করা
-                new_caption = f"{old_caption}\nLink: `{my_direct_link}`"
-
-                await bot.edit_message_caption(
-                    chat_id=int(Config.STORAGE_CHANNEL),
-                    message_id=msg_id,
-                    caption=new_caption,
-                    parse_mode=enums.ParseMode.MARKDOWN
-                )
-        except Exception as e:
-            print(f"Edit error: {e}")
-
         btn = InlineKeyboardMarkup(
             [
                 [
                     InlineKeyboardButton(
-                        "🖥️ Watch Online", url=f"{Config.BASE_URL}/show/{u_id}"
+                        "🖥️ Watch Online", url=show_link(existing["_id"], *link_args)
                     )
                 ]
             ]
@@ -137,64 +201,76 @@ async def file_handler(_, message: Message):
         )
 
     # নতুন ফাইল হলে নাম চাইবে
-    waiting_for_name[message.from_user.id] = message
+    await db.set_pending(
+        message.from_user.id,
+        {
+            "chat_id": message.chat.id,
+            "message_id": message.id,
+            "file_unique_id": media.file_unique_id,
+            "ext": os.path.splitext(media.file_name or "video.mkv")[1] or ".mkv",
+            "file_size": media.file_size,
+            "mime_type": media.mime_type,
+        },
+    )
     await message.reply_text("📝 **Please send a Name for this file:**")
 
 
 @bot.on_message(filters.private & filters.text & ~filters.command("start"))
 async def process_name(client, message):
-    uid = message.from_user.id
-    if uid not in waiting_for_name:
+    pending = await db.pop_pending(message.from_user.id)
+    if not pending:
         return
 
-    orig_msg = waiting_for_name.pop(uid)
-    media = orig_msg.document or orig_msg.video or orig_msg.audio
-
     user_input_name = message.text.replace(" ", "_")
-    ext = os.path.splitext(getattr(media, "file_name", "video.mkv"))[1] or ".mkv"
+    ext = pending["ext"]
     final_file_name = (
         f"[Moviedekhobd.rf.gd] {user_input_name} [Moviedekhobd.rf.gd]{ext}"
     )
 
     sts = await message.reply_text("🚀 **Storing and Generating Link...**")
 
+    link_id = secrets.token_urlsafe(8)
     try:
         # স্টোরেজ চ্যানেলে কপি পাঠানো (নামের ঝামেলা এড়াতে)
-        sent = await orig_msg.copy(
+        sent = await client.copy_message(
             chat_id=int(Config.STORAGE_CHANNEL),
+            from_chat_id=pending["chat_id"],
+            message_id=pending["message_id"],
             caption=f"Name: {user_input_name}",  # শুরুতে শুধু নাম থাকবে
         )
 
-        u_id = secrets.token_urlsafe(8)
-        msg_id = sent.id
-        direct_link = (
-            f"{Config.BASE_URL}/dl/{msg_id}/{quote(sanitize_filename(final_file_name))}"
-        )
-
-        # প্রথম বটের লিঙ্কটি ক্যাপশনে যোগ করা
-        new_caption = f"Name: {user_input_name}\n\nLink: `{direct_link}`"
-
-        await client.edit_message_caption(
-           chat_id=int(Config.STORAGE_CHANNEL),
-           message_id=msg_id,
-           caption=new_caption
+        link_args = (
+            sent.id,
+            pending["file_unique_id"],
+            pending["file_size"],
+            pending["mime_type"],
+            final_file_name,
         )
+        direct_link = dl_link(*link_args)
 
-        # ডা+টাবেসে এন্ট্রি
-        await db.collection.insert_one(
+        # ডাটাবেসে এন্ট্রি, ক্যাপশন আর seek index ব্যাকগ্রাউন্ড জবে;
+        # লিঙ্ক কপির সাথে সাথেই ইউজারের কাছে যাবে
+        await jobs.put(
+            "store_file",
             {
-                "_id": u_id,
-                "message_id": msg_id,
-                "file_unique_id": media.file_unique_id,
-                "file_name": final_file_name,
-            }
+                "file": {
+                    "_id": link_id,
+                    "message_id": sent.id,
+                    "file_unique_id": pending["file_unique_id"],
+                    "file_name": final_file_name,
+                    "file_size": pending["file_size"],
+                    "mime_type": pending["mime_type"],
+                },
+                # প্রথম বটের লিঙ্কটি ক্যাপশনে যোগ করা
+                "caption": f"Name: {user_input_name}\n\nLink: `{direct_link}`",
+            },
         )
 
         btn = InlineKeyboardMarkup(
             [
                 [
                     InlineKeyboardButton(
-                        "🖥️ Watch Online", url=f"{Config.BASE_URL}/show/{u_id}"
+                        "🖥️ Watch Online", url=show_link(link_id, *link_args)
                     )
                 ]
             ]
@@ -208,149 +284,197 @@ async def process_name(client, message):
         await sts.edit(f"❌ Error: {str(e)}")
 
 
-@bot.on_message(filters.private & (filters.document | filters.video | filters.audio))
-async def file_handler(_, message: Message):
-    await handle_file_upload(message)
-
-
 # ==============================================
-# STREAMING ENGINE
+# BACKGROUND JOBS (jobs.py: batching, per-chat rate limit, retry)
 # ==============================================
-class ByteStreamer:
-    def __init__(self, client: Client):
-        self.client = client
+@jobs.handler("store_file", batch=True)
+async def store_files(payloads):
+    """Naye uploads ek bulk write me; jo sach me naye hain unka caption + index."""
+    stored = await db.upsert_files([p["file"] for p in payloads])
+    storage = int(Config.STORAGE_CHANNEL)
+    for p in payloads:
+        doc = p["file"]
+        if doc["file_unique_id"] not in stored:
+            continue  # race: wahi file kisi aur upload se pehle store ho gayi
+        await jobs.put(
+            "set_caption",
+            {"chat_id": storage, "message_id": doc["message_id"], "caption": p["caption"]},
+            chat_id=storage,
+        )
+        await jobs.put("index", {"unique_id": doc["_id"], "mid": doc["message_id"]})
 
-    async def yield_file(self, f, i, offset, fc, lc, pc, cs):
-        work_loads[i] += 1
-        try:
-            ms = self.client.media_sessions.get(f.dc_id)
-            if not ms:
-                if f.dc_id != await self.client.storage.dc_id():
-                    auth = await Auth(
-                        self.client, f.dc_id, await self.client.storage.test_mode()
-                    ).create()
-                    ms = Session(
-                        self.client,
-                        f.dc_id,
-                        auth,
-                        await self.client.storage.test_mode(),
-                        is_media=True,
-                    )
-                    await ms.start()
-                    exp = await self.client.invoke(
-                        raw.functions.auth.ExportAuthorization(dc_id=f.dc_id)
-                    )
-                    await ms.invoke(
-                        raw.functions.auth.ImportAuthorization(
-                            id=exp.id, bytes=exp.bytes
-                        )
-                    )
-                else:
-                    ms = self.client.session
-                self.client.media_sessions[f.dc_id] = ms
-
-            loc = raw.types.InputDocumentFileLocation(
-                id=f.media_id,
-                access_hash=f.access_hash,
-                file_reference=f.file_reference,
-                thumb_size=f.thumbnail_size,
-            )
-
-            for chunk in range(1, pc + 1):
-                r = await ms.invoke(
-                    raw.functions.upload.GetFile(location=loc, offset=offset, limit=cs),
-                    retries=0,
-                )
-                if not r.bytes:
-                    break
-                if pc == 1:
-                    yield r.bytes[fc:lc]
-                elif chunk == 1:
-                    yield r.bytes[fc:]
-                elif chunk == pc:
-                    yield r.bytes[:lc]
-                else:
-                    yield r.bytes
-                offset += cs
-        finally:
-            work_loads[i] -= 1
-
-
-@app.get("/dl/{mid}/{fname}")
-async def stream_media(r: Request, mid: int, fname: str):
-    idx = min(work_loads, key=work_loads.get)
-    c = multi_clients[idx]
-    st = class_cache.get(c) or ByteStreamer(c)
-    class_cache[c] = st
 
+@jobs.handler("set_caption")
+async def set_caption(p):
+    try:
+        await bot.edit_message_caption(
+            chat_id=p["chat_id"], message_id=p["message_id"], caption=p["caption"]
+        )
+    except MessageNotModified:
+        pass
+
+
+@jobs.handler("append_link")
+async def append_link(p):
+    # স্টোরেজ চ্যানেলের সেই মেসেজটি আনা
+    target_msg = await bot.get_messages(p["chat_id"], p["message_id"])
+    old_caption = target_msg.caption or ""
+
+    # যদি এই বটের লিঙ্ক আগে থেকে ক্যাপশনে না থাকে, তবেই আপডেট হবে
+    if Config.BASE_URL in old_caption:
+        return
     try:
-        msg = await c.get_messages(int(Config.STORAGE_CHANNEL), mid)
-        m = msg.document or msg.video or msg.audio
-        fid = FileId.decode(m.file_id)
-        size = m.file_size
-
-        # ===== MIME TYPE FIX =====
-        fname_lower = (m.file_name or "").lower()
-        if fname_lower.endswith(".mp4"):
-            content_type = "video/mp4"
-        elif fname_lower.endswith(".mkv"):
-            content_type = "video/x-matroska"
-        elif fname_lower.endswith(".webm"):
-            content_type = "video/webm"
-        else:
-            content_type = "application/octet-stream"
-
-        # ===== Range headers =====
-        rh = r.headers.get("Range", "")
-        fb, ub = 0, size - 1
-        if rh:
-            parts = rh.replace("bytes=", "").split("-")
-            fb = int(parts[0])
-            if len(parts) > 1 and parts[1]:
-                ub = int(parts[1])
-        rl = ub - fb + 1
-        cs = 1024 * 512  # 512 KB chunk
-        off = (fb // cs) * cs
-        fc = fb - off
-        lc = (ub % cs) + 1
-        pc = math.ceil(rl / cs)
-
-        # ===== HEADERS =====
-        headers = {
-            "Content-Type": content_type,
-            "Accept-Ranges": "bytes",
-            "Content-Length": str(rl),
-            "Content-Disposition": f'inline; filename="{fname}"',
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
-            "Access-Control-Allow-Headers": "Range, Content-Type, X-Requested-With",
-            "Access-Control-Expose-Headers": "Content-Range, Content-Length, Accept-Ranges",
-            "Cache-Control": "no-cache",
-        }
-
-        # ===== Content-Range =====
-        if rh:
-            headers["Content-Range"] = f"bytes {fb}-{ub}/{size}"
-
-        return StreamingResponse(
-            st.yield_file(fid, idx, off, fc, lc, pc, cs),
-            status_code=206 if rh else 200,
-            headers=headers,
+        # আগের ক্যাপশন ঠিক রেখে নতুন লাইন যোগ করা
+        await bot.edit_message_caption(
+            chat_id=p["chat_id"],
+            message_id=p["message_id"],
+            caption=f"{old_caption}\nLink: `{p['link']}`",
+            parse_mode=enums.ParseMode.MARKDOWN,
         )
-    except Exception:
-        raise HTTPException(404)
+    except MessageNotModified:
+        pass
+
+
+@jobs.handler("index")
+async def index_media(p):
+    """Naye file ka header + seek index (ingest stage)."""
+    media = await index_file(p["unique_id"], p["mid"])
+    if media:
+        print(f"✅ Indexed {p['unique_id']}: {media['container']}, {len(media['keyframes'])} keyframes")
+        audio = hls_unsupported_audio(media)
+        if audio:
+            print(f"ℹ️ {p['unique_id']}: no AAC audio ({', '.join(audio)}), HLS off, /dl only")
+
+
+# ==============================================
+# STREAMING (streaming package)
+# ==============================================
+# {key}: signed token, ya purane links ke liye storage message id
+@app.api_route("/dl/{key}/{fname}", methods=["GET", "HEAD"])
+async def stream_media(r: Request, key: str, fname: str):
+    return await serve_media(r, key, fname)
 
 
 # ===== OPTIONS route for preflight fix =====
-@app.options("/dl/{mid}/{fname}")
-async def options_dl(mid: int, fname: str):
-    return JSONResponse(
-        content={},
-        headers={
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET, OPTIONS",
-            "Access-Control-Allow-Headers": "Range, Content-Type",
-        },
+@app.options("/dl/{key}/{fname}")
+async def options_dl(key: str, fname: str):
+    return options_response()
+
+
+# ==============================================
+# HLS (keyframe-aligned fMP4 segments, no re-encode)
+# ==============================================
+@app.get("/hls/{unique_id}/index.m3u8")
+async def hls_index(unique_id: str):
+    return await hls_playlist(unique_id)
+
+
+@app.get("/hls/{unique_id}/init.mp4")
+async def hls_init_segment(r: Request, unique_id: str):
+    return await hls_init(r, unique_id)
+
+
+@app.get("/hls/{unique_id}/{n}.m4s")
+async def hls_media_segment(r: Request, unique_id: str, n: int):
+    return await hls_segment(r, unique_id, n)
+
+
+# ==============================================
+# FILE API (used by show.html)
+# ==============================================
+api_cache = OrderedDict()  # unique_id -> (expires_at, rendered JSON bytes)
+api_flights = SingleFlight()
+api_stats = {"hit": 0, "miss": 0}  # api_cache lookups (signed links cache me nahi jaate)
+
+
+async def build_file_info(unique_id):
+    doc = await db.get_file(unique_id)
+    if not doc:
+        raise HTTPException(404, detail="Link expired or invalid.")
+
+    if doc.get("file_size") is None or not doc.get("mime_type"):
+        # purani entries me size/mime nahi hai: ek baar Telegram se laake DB me save
+        props = await (await acquire_streamer()).get_file_properties(doc["message_id"])
+        doc["file_size"] = props["file_size"]
+        doc["mime_type"] = props["mime_type"]
+        await db.update_file(
+            unique_id, {"file_size": doc["file_size"], "mime_type": doc["mime_type"]}
+        )
+
+    file_name = doc.get("file_name") or "video.mkv"
+    info = {
+        "file_name": mask_filename(file_name),
+        "file_size": get_readable_size(doc["file_size"]),
+        "mime_type": doc["mime_type"],
+        "is_media": doc["mime_type"].startswith(("video/", "audio/")),
+        "direct_dl_link": dl_link(
+            doc["message_id"], doc["file_unique_id"], doc["file_size"], doc["mime_type"], file_name
+        ),
+        "duration": doc.get("media", {}).get("duration"),
+        "hls_link": (
+            f"{Config.BASE_URL}/hls/{unique_id}/index.m3u8"
+            if hls_supported(doc.get("media"))
+            else None
+        ),
+    }
+    body = json.dumps(info).encode()
+    api_cache[unique_id] = (time.monotonic() + Config.API_CACHE_TTL, body)
+    api_cache.move_to_end(unique_id)
+    while len(api_cache) > Config.API_CACHE_SIZE:
+        api_cache.popitem(last=False)
+    return body
+
+
+async def signed_file_info(link):
+    """Signed token se /api/file jawab: Telegram nahi, aur Mongo sirf cached media
+    index (duration + HLS) ke liye, jab token me link id ho."""
+    media = await get_index(link["file_unique_id"]) if link["link_id"] else None
+    info = {
+        "file_name": mask_filename(link["file_name"]),
+        "file_size": get_readable_size(link["file_size"]),
+        "mime_type": link["mime_type"],
+        "is_media": link["mime_type"].startswith(("video/", "audio/")),
+        "direct_dl_link": dl_link(
+            link["mid"], link["file_unique_id"], link["file_size"], link["mime_type"],
+            link["file_name"] or "video.mkv",
+        ),
+        "duration": media.get("duration") if media else None,
+        "hls_link": (
+            f"{Config.BASE_URL}/hls/{link['link_id']}/index.m3u8"
+            if hls_supported(media)
+            else None
+        ),
+    }
+    return json.dumps(info).encode()
+
+
+@app.get("/api/file/{unique_id}")
+async def file_info(unique_id: str):
+    link = verify_link(unique_id)
+    entry = api_cache.get(unique_id)
+    if link is not None:
+        try:
+            body = await signed_file_info(link)
+        except Exception:
+            print(f"Error in /api/file route: {traceback.format_exc()}")
+            raise HTTPException(500, detail="Internal server error.")
+    elif entry and entry[0] > time.monotonic():
+        api_stats["hit"] += 1
+        api_cache.move_to_end(unique_id)
+        body = entry[1]
+    else:
+        api_stats["miss"] += 1
+        try:
+            body = await api_flights.do(unique_id, lambda: build_file_info(unique_id))
+        except HTTPException:
+            raise
+        except Exception:
+            print(f"Error in /api/file route: {traceback.format_exc()}")
+            raise HTTPException(500, detail="Internal server error.")
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"Cache-Control": f"public, max-age={Config.API_CACHE_TTL}"},
     )
 
 
@@ -362,6 +486,65 @@ async def show_page(request: Request, unique_id: str):
     return templates.TemplateResponse("show.html", {"request": request})
 
 
+# ==============================================
+# METRICS
+# ==============================================
+metrics.Collected(
+    "streambot_active_streams", "Active /dl streams per client index.", "gauge",
+    ("client",), lambda: {(i,): n for i, n in work_loads.items()},
+)
+metrics.Collected(
+    "streambot_inflight_bytes", "GetFile bytes in flight per client index.", "gauge",
+    ("client",), lambda: {(i,): n for i, n in inflight_bytes.items()},
+)
+metrics.Collected(
+    "streambot_media_sessions", "Open media sessions per client index.", "gauge",
+    ("client",), lambda: {(st.index,): st.sessions.count() for st in class_cache.values()},
+)
+metrics.Collected(
+    "streambot_fair_parts", "GetFile parts holding or waiting for a fair-share slot.", "gauge",
+    ("state",), lambda: {("inflight",): scheduler.inflight, ("waiting",): scheduler.waiting},
+)
+metrics.Collected(
+    "streambot_jobs_pending", "Background jobs waiting or running, by kind.", "gauge",
+    ("kind",), lambda: {(k,): sum(j["kind"] == k for j in jobs.jobs.values()) for k in jobs.handlers},
+)
+metrics.Collected(
+    "streambot_viewers", "Viewers (IP + link) with open /dl connections.", "gauge",
+    (), lambda: {(): len(scheduler.viewers)},
+)
+
+
+def cache_counts():
+    counts = {
+        ("chunk_disk", "hit"): chunk_cache.hits,
+        ("chunk_disk", "miss"): chunk_cache.misses,
+        ("part_singleflight", "hit"): part_flights.hits,
+        ("part_singleflight", "miss"): part_flights.misses,
+        ("api_file", "hit"): api_stats["hit"],
+        ("api_file", "miss"): api_stats["miss"],
+        ("pinned_region", "hit"): pinned.hits,
+        ("pinned_region", "miss"): pinned.misses,
+        ("media_metadata", "hit"): 0,
+        ("media_metadata", "miss"): 0,
+    }
+    for st in class_cache.values():
+        counts[("media_metadata", "hit")] += st.hits
+        counts[("media_metadata", "miss")] += st.misses
+    return counts
+
+
+metrics.Collected(
+    "streambot_cache_requests_total", "Cache lookups by cache and result.", "counter",
+    ("cache", "result"), cache_counts,
+)
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 # ==============================================
 # HEALTH CHECK
 # ==============================================
@@ -381,4 +564,5 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=int(os.environ.get("PORT", 8000)),
         log_level="info",
+        workers=Config.WORKERS,
     )
@@ -0,0 +1,409 @@
+# benchmark.py (streaming benchmark against a fake Telegram backend)
+#
+# Usage: python3 benchmark.py [--concurrency 50] [--duration 20] [--signed] [--out result.json]
+#        python3 benchmark.py --compare baseline.json --out new.json
+#        python3 benchmark.py --crypto-sweep 8 [--out sweep.json]
+#
+# Koi Telegram credentials nahi chahiye: ek nakli client + media session
+# upload.GetFile ka jawab deta hai (latency, jitter, FloodWait ke saath), aur
+# requests seedhe ASGI app ko jaate hain.
+#
+# --crypto: GetFile ka jawab asli MTProto packet (AES-IGE encrypted) hota hai
+# aur Pyrogram ki tarah `pyrogram.crypto_executor` me unpack hota hai.
+# --crypto-sweep N: yahi run CRYPTO_WORKERS=1..N ke saath (har ek alag process).
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import resource
+import tempfile
+import subprocess
+from io import BytesIO
+from hashlib import sha1, sha256
+from datetime import datetime
+from types import SimpleNamespace
+
+# benchmark me disk cache default band, taaki har run Telegram path naape
+os.environ.setdefault("CHUNK_CACHE_MAX_BYTES", "0")
+os.environ.setdefault("GETFILE_RATE", "0")
+# har reader apna X-Forwarded-For bhejta hai (alag viewers)
+os.environ.setdefault("REAL_IP_HEADER", "X-Forwarded-For")
+
+import pyrogram
+from pyrogram import raw
+from pyrogram.crypto import aes, mtproto
+from pyrogram.errors import FloodWait
+from pyrogram.file_id import FileId, FileType
+from pyrogram.raw.core import Message, Long
+
+import app as stream_app
+from streaming import pool, ByteStreamer, chunk_cache, sign_link, setup_crypto_executor
+
+PAYLOAD = bytes(1024 * 1024)
+
+
+class FakeBackend:
+    """Nakli Telegram: ek file, configurable latency/jitter/FloodWait."""
+
+    def __init__(self, args):
+        self.args = args
+        self.file_size = args.file_size
+        self.calls = 0
+        self.flood_waits = 0
+
+    async def get_file(self, offset, limit):
+        self.calls += 1
+        delay = self.args.latency + random.uniform(-self.args.jitter, self.args.jitter)
+        await asyncio.sleep(max(0.0, delay))
+        if random.random() < self.args.flood_rate:
+            self.flood_waits += 1
+            raise FloodWait(value=self.args.flood_seconds)
+        n = max(0, min(limit, self.file_size - offset))
+        return SimpleNamespace(bytes=PAYLOAD[:n])
+
+
+class FakeSession:
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def invoke(self, query, retries=0, timeout=None, sleep_threshold=None):
+        return await self.backend.get_file(query.offset, query.limit)
+
+
+class CryptoSession(FakeSession):
+    """GetFile ka jawab server jaisa encrypted packet; decrypt asli mtproto.unpack se."""
+
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.auth_key = os.urandom(256)
+        self.auth_key_id = sha1(self.auth_key).digest()[-8:]
+        self.session_id = os.urandom(8)
+        self.packets = {}  # part size -> packet (encrypt ek hi baar)
+
+    def packet(self, n):
+        if n not in self.packets:
+            body = raw.types.upload.File(
+                type=raw.types.storage.FilePartial(), mtime=0, bytes=PAYLOAD[:n]
+            )
+            message = Message(body, msg_id=1, seq_no=1, length=len(body.write()))
+            data = Long(0) + self.session_id + message.write()
+            data += os.urandom(-(len(data) + 12) % 16 + 12)
+            # server -> client: msg_key auth_key[96:] se, kdf outgoing=False
+            msg_key = sha256(self.auth_key[96:128] + data).digest()[8:24]
+            aes_key, aes_iv = mtproto.kdf(self.auth_key, msg_key, False)
+            self.packets[n] = self.auth_key_id + msg_key + aes.ige256_encrypt(data, aes_key, aes_iv)
+        return self.packets[n]
+
+    async def invoke(self, query, retries=0, timeout=None, sleep_threshold=None):
+        result = await self.backend.get_file(query.offset, query.limit)
+        packet = self.packet(len(result.bytes))
+        # Pyrogram Session.handle_packet jaisa
+        message = await asyncio.get_running_loop().run_in_executor(
+            pyrogram.crypto_executor,
+            mtproto.unpack,
+            BytesIO(packet),
+            self.session_id,
+            self.auth_key,
+            self.auth_key_id,
+        )
+        return message.body
+
+
+class FakeSessionPool:
+    def __init__(self, session):
+        self.session = session
+
+    async def get(self, dc_id):
+        return self.session
+
+    async def replace(self, dc_id, ms):
+        return self.session
+
+    async def prewarm(self, dc_ids):
+        pass
+
+    def count(self, dc_id=None):
+        return 1
+
+    async def close(self):
+        pass
+
+
+class FakeClient:
+    def __init__(self, backend):
+        self.backend = backend
+        file_id = FileId(
+            file_type=FileType.DOCUMENT,
+            dc_id=4,
+            media_id=1234567890,
+            access_hash=987654321,
+            file_reference=b"bench",
+        ).encode()
+        self.document = SimpleNamespace(
+            file_id=file_id,
+            file_unique_id="BenchFileUniqueId",
+            file_size=backend.file_size,
+            file_name="bench.mkv",
+            mime_type="video/x-matroska",
+        )
+
+    async def get_messages(self, chat_id, message_ids):
+        await asyncio.sleep(self.backend.args.latency)
+        return SimpleNamespace(
+            id=message_ids,
+            empty=False,
+            date=datetime(2025, 1, 1),
+            document=self.document,
+            video=None,
+            audio=None,
+        )
+
+
+def install(backend):
+    """App ke client pool me nakli client daalta hai (lifespan nahi chalta)."""
+    chunk_cache.open()
+    client = FakeClient(backend)
+    pool.add_client(0, client)
+    st = ByteStreamer(client, 0)
+    if backend.args.crypto:
+        setup_crypto_executor()
+        st.sessions = FakeSessionPool(CryptoSession(backend))
+    else:
+        st.sessions = FakeSessionPool(FakeSession(backend))
+    pool.class_cache[client] = st
+
+
+async def asgi_get(path, headers):
+    """Ek GET request seedhe ASGI app ko; (status, bytes, ttfb) deta hai."""
+    done = asyncio.Event()
+    state = {"status": 0, "bytes": 0, "ttfb": None}
+    started = time.monotonic()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")] + [(k.encode(), v.encode()) for k, v in headers],
+        "client": ("127.0.0.1", 12345),
+        "server": ("bench", 80),
+    }
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            state["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            if message.get("body") and state["ttfb"] is None:
+                state["ttfb"] = time.monotonic() - started
+            state["bytes"] += len(message.get("body", b""))
+            if not message.get("more_body"):
+                done.set()
+
+    try:
+        await stream_app.app(scope, receive, send)
+    finally:
+        done.set()
+    return state["status"], state["bytes"], state["ttfb"]
+
+
+async def reader(kind, args, deadline, results, n):
+    size = args.file_size
+    while time.monotonic() < deadline:
+        # har reader alag viewer (fair scheduler IP + link se group karta hai)
+        headers = [("x-forwarded-for", f"10.0.{n // 256}.{n % 256}")]
+        if kind == "range":
+            start = random.randrange(0, max(1, size - args.range_size))
+            end = min(size, start + args.range_size) - 1
+            headers.append(("range", f"bytes={start}-{end}"))
+        try:
+            status, nbytes, ttfb = await asgi_get(args.path, headers)
+        except Exception:
+            results["errors"] += 1
+            continue
+        results["requests"] += 1
+        results["bytes"] += nbytes
+        if status >= 400:
+            results["errors"] += 1
+        if ttfb is not None:
+            results["ttfb"].append(ttfb)
+
+
+async def loop_lag(samples, stop):
+    interval = 0.01
+    while not stop.is_set():
+        t = time.monotonic()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.monotonic() - t - interval))
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def ms(value):
+    return None if value is None else round(value * 1000, 2)
+
+
+async def run(args):
+    backend = FakeBackend(args)
+    install(backend)
+    args.path = "/dl/1/bench.mkv"
+    if args.signed:
+        token = sign_link(1, "BenchFileUniqueId", args.file_size, "video/x-matroska")
+        args.path = f"/dl/{token}/bench.mkv"
+    results = {"requests": 0, "errors": 0, "bytes": 0, "ttfb": []}
+    lag, stop = [], asyncio.Event()
+    lag_task = asyncio.create_task(loop_lag(lag, stop))
+
+    started = time.monotonic()
+    deadline = started + args.duration
+    kinds = ["sequential"] * args.sequential + ["range"] * (args.concurrency - args.sequential)
+    await asyncio.gather(*(reader(k, args, deadline, results, n) for n, k in enumerate(kinds)))
+    elapsed = time.monotonic() - started
+    stop.set()
+    await lag_task
+
+    return {
+        "config": {
+            k: v for k, v in vars(args).items()
+            if k not in ("out", "compare", "path", "crypto_sweep")
+        },
+        "crypto_workers": pyrogram.crypto_executor._max_workers,
+        "requests": results["requests"],
+        "errors": results["errors"],
+        "bytes": results["bytes"],
+        "duration_s": round(elapsed, 3),
+        "throughput_mb_s": round(results["bytes"] / elapsed / 1024 / 1024, 2),
+        "ttfb_ms": {
+            "p50": ms(percentile(results["ttfb"], 50)),
+            "p99": ms(percentile(results["ttfb"], 99)),
+        },
+        "loop_lag_ms": {
+            "p50": ms(percentile(lag, 50)),
+            "p99": ms(percentile(lag, 99)),
+            "max": ms(max(lag, default=None)),
+        },
+        # Linux pe ru_maxrss KB me hota hai
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "upstream": {"getfile_calls": backend.calls, "flood_waits": backend.flood_waits},
+    }
+
+
+def compare(result, baseline):
+    rows = [
+        ("throughput_mb_s", result["throughput_mb_s"], baseline.get("throughput_mb_s")),
+        ("ttfb_p50_ms", result["ttfb_ms"]["p50"], baseline.get("ttfb_ms", {}).get("p50")),
+        ("ttfb_p99_ms", result["ttfb_ms"]["p99"], baseline.get("ttfb_ms", {}).get("p99")),
+        ("loop_lag_p99_ms", result["loop_lag_ms"]["p99"], baseline.get("loop_lag_ms", {}).get("p99")),
+        ("peak_rss_mb", result["peak_rss_mb"], baseline.get("peak_rss_mb")),
+        ("getfile_calls", result["upstream"]["getfile_calls"], baseline.get("upstream", {}).get("getfile_calls")),
+    ]
+    print(f"{'metric':<18}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, new, old in rows:
+        change = f"{(new - old) / old * 100:+.1f}%" if new is not None and old else "-"
+        print(f"{name:<18}{str(old):>12}{str(new):>12}{change:>10}")
+
+
+def crypto_sweep(args):
+    """CRYPTO_WORKERS=1..N: har value ek naye process me --crypto run."""
+    argv = [a for a in sys.argv[1:] if a != "--crypto"]
+    for name in ("--crypto-sweep", "--out", "--compare"):
+        argv = strip_option(argv, name)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in range(1, args.crypto_sweep + 1):
+            # stdout pe startup prints bhi aate hain, isliye result file se
+            out = os.path.join(tmp, f"crypto{workers}.json")
+            subprocess.run(
+                [sys.executable, __file__, *argv, "--crypto", "--out", out],
+                env=dict(os.environ, CRYPTO_WORKERS=str(workers)),
+                check=True, stdout=subprocess.DEVNULL,
+            )
+            with open(out) as fh:
+                results.append(json.load(fh))
+    print(f"{'workers':>8}{'MB/s':>10}{'ttfb_p50':>10}{'ttfb_p99':>10}{'lag_p99':>10}")
+    for r in results:
+        print(
+            f"{r['crypto_workers']:>8}{r['throughput_mb_s']:>10}{str(r['ttfb_ms']['p50']):>10}"
+            f"{str(r['ttfb_ms']['p99']):>10}{str(r['loop_lag_ms']['p99']):>10}"
+        )
+    return results
+
+
+def strip_option(argv, name):
+    """`--name value` / `--name=value` hatao (sweep child process ke liye)."""
+    out, skip = [], False
+    for a in argv:
+        if skip:
+            skip = False
+        elif a == name:
+            skip = True
+        elif not a.startswith(name + "="):
+            out.append(a)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /dl against a fake Telegram backend")
+    parser.add_argument("--concurrency", type=int, default=50, help="total readers")
+    parser.add_argument("--sequential", type=int, default=10, help="readers fetching the whole file")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--file-size", type=int, default=32 * 1024 * 1024)
+    parser.add_argument("--range-size", type=int, default=256 * 1024)
+    parser.add_argument("--latency", type=float, default=0.05, help="GetFile latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="+/- latency jitter (s)")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="FloodWait probability per GetFile")
+    parser.add_argument("--flood-seconds", type=int, default=3)
+    parser.add_argument("--signed", action="store_true", help="request signed /dl/<token> links")
+    parser.add_argument("--crypto", action="store_true", help="real AES-IGE unpack per GetFile")
+    parser.add_argument(
+        "--crypto-sweep", type=int, default=0, metavar="N",
+        help="run --crypto with CRYPTO_WORKERS=1..N and print a table",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline results JSON to diff against")
+    args = parser.parse_args()
+    args.sequential = min(args.sequential, args.concurrency)
+    random.seed(args.seed)
+
+    if args.crypto_sweep:
+        results = crypto_sweep(args)
+        if args.out:
+            with open(args.out, "w") as fh:
+                json.dump(results, fh, indent=2)
+        return
+
+    result = asyncio.run(run(args))
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(result, fh, indent=2)
+    if args.compare:
+        with open(args.compare) as fh:
+            compare(result, json.load(fh))
+
+
+if __name__ == "__main__":
+    main()
@@ -30,5 +30,117 @@ class Config:
         except ValueError: FORCE_SUB_CHANNEL = _fsub_channel_str
     else: FORCE_SUB_CHANNEL = 0
         
+    # Extra bots jo sirf streaming ke liye pool me judenge (comma separated)
+    MULTI_BOT_TOKENS = [
+        t.strip() for t in os.environ.get("MULTI_BOT_TOKENS", "").split(",") if t.strip()
+    ]
+
+    # Streaming read-ahead: kitne GetFile parts ek saath in-flight rahenge,
+    # aur ek stream kitne bytes tak buffer kar sakta hai
+    PREFETCH_PARTS = int(os.environ.get("PREFETCH_PARTS", 4))
+    PREFETCH_MAX_BYTES = int(os.environ.get("PREFETCH_MAX_BYTES", 8 * 1024 * 1024))
+
+    # Popular files ke parts disk pe cache honge (0 = disabled). WORKERS > 1
+    # pe har worker ko apni sub-directory aur MAX_BYTES / WORKERS milta hai
+    CHUNK_CACHE_DIR = os.environ.get("CHUNK_CACHE_DIR", "chunk_cache")
+    CHUNK_CACHE_MAX_BYTES = int(os.environ.get("CHUNK_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+    CHUNK_CACHE_POLICY = os.environ.get("CHUNK_CACHE_POLICY", "lru").lower()  # lru / lfu
+
+    # /dl ke liye message metadata cache (get_messages bachane ke liye)
+    MEDIA_CACHE_SIZE = int(os.environ.get("MEDIA_CACHE_SIZE", 1024))
+    MEDIA_CACHE_TTL = int(os.environ.get("MEDIA_CACHE_TTL", 30 * 60))
+
+    # Media sessions: har DC pe kitne parallel sessions, startup pe kaunse
+    # DCs warm karne hain (comma separated), aur health check interval (sec)
+    MEDIA_SESSIONS_PER_DC = int(os.environ.get("MEDIA_SESSIONS_PER_DC", 2))
+    PREWARM_DCS = [
+        int(d) for d in os.environ.get("PREWARM_DCS", "").split(",") if d.strip()
+    ]
+    SESSION_HEALTH_INTERVAL = int(os.environ.get("SESSION_HEALTH_INTERVAL", 60))
+
+    # File bhejne ke baad naam ka kitni der (sec) intezaar karein
+    PENDING_UPLOAD_TTL = int(os.environ.get("PENDING_UPLOAD_TTL", 15 * 60))
+
+    # /api/file responses kitni der memory me rahenge
+    API_CACHE_SIZE = int(os.environ.get("API_CACHE_SIZE", 4096))
+    API_CACHE_TTL = int(os.environ.get("API_CACHE_TTL", 5 * 60))
+
+    # /dl ke Cache-Control rules: "type=policy;type=policy" (video/*, exact type, ya *)
+    CACHE_CONTROL = dict(
+        rule.strip().split("=", 1)
+        for rule in os.environ.get(
+            "CACHE_CONTROL",
+            "video/*=public, max-age=86400;audio/*=public, max-age=86400;*=no-cache",
+        ).split(";")
+        if "=" in rule
+    )
+
+    # MTProto decrypt ke liye threads (1 = Pyrogram ka default single thread).
+    # Tabhi badhao jab multi-core machine pe `benchmark.py --crypto-sweep N` me
+    # throughput badhe aur TTFB p99 na bigde; 1 core pe isse sirf nuksaan hai
+    CRYPTO_WORKERS = int(os.environ.get("CRYPTO_WORKERS", 1))
+
+    # Telegram rate limits: har client ke liye, GetFile per DC aur get_messages
+    # ke liye alag token bucket (requests/sec, burst). 0 = no limit
+    GETFILE_RATE = float(os.environ.get("GETFILE_RATE", 100))
+    GETFILE_BURST = int(os.environ.get("GETFILE_BURST", 200))
+    API_RATE = float(os.environ.get("API_RATE", 20))
+    API_BURST = int(os.environ.get("API_BURST", 40))
+    # Fail hua part kitni baar doosre client pe retry ho, aur naya stream
+    # FloodWait khatam hone ka kitni der (sec) intezaar kare
+    PART_RETRIES = int(os.environ.get("PART_RETRIES", 3))
+    STREAM_QUEUE_TIMEOUT = float(os.environ.get("STREAM_QUEUE_TIMEOUT", 10))
+
+    # Multi-worker mode: kitne uvicorn workers, unke shared load counters
+    # kahan rahenge, aur bot updates wale worker ka lock file
+    WORKERS = int(os.environ.get("WORKERS", 1))
+    LOAD_SHM_PATH = os.environ.get(
+        "LOAD_SHM_PATH",
+        "/dev/shm/streambot_load" if os.path.isdir("/dev/shm") else "streambot_load",
+    )
+    LOAD_SYNC_INTERVAL = float(os.environ.get("LOAD_SYNC_INTERVAL", 0.2))
+    BOT_LOCK_FILE = os.environ.get("BOT_LOCK_FILE", "/tmp/streambot_updates.lock")
+
+    # Ingest pe MP4 moov / MKV cues padhne ki limit, aur /dl ke liye header
+    # + index regions ka memory buffer (ek region itne se bada ho to pin nahi)
+    PROBE_MAX_BYTES = int(os.environ.get("PROBE_MAX_BYTES", 16 * 1024 * 1024))
+    PIN_CACHE_BYTES = int(os.environ.get("PIN_CACHE_BYTES", 64 * 1024 * 1024))
+    PIN_REGION_MAX_BYTES = int(os.environ.get("PIN_REGION_MAX_BYTES", 4 * 1024 * 1024))
+
+    # /hls: segment ki target length (sec, keyframes pe katega) aur kitne
+    # files ke parsed sample tables memory me rahenge
+    HLS_SEGMENT_SECONDS = float(os.environ.get("HLS_SEGMENT_SECONDS", 6))
+    HLS_SOURCE_CACHE = int(os.environ.get("HLS_SOURCE_CACHE", 8))
+
+    # Signed links (/dl/<token>/...): HMAC key (khali = BOT_TOKEN se derive),
+    # link kitni der (sec) valid rahe (0 = hamesha), aur purane /dl/<msg_id>
+    # links chalu rahein ya nahi (band karo to message ids guess nahi ho sakte)
+    LINK_SECRET = os.environ.get("LINK_SECRET", "")
+    SIGNED_LINK_TTL = int(os.environ.get("SIGNED_LINK_TTL", 0))
+    ALLOW_RAW_DL = os.environ.get("ALLOW_RAW_DL", "true").lower() in ("1", "true", "yes")
+
+    # Fair scheduling (har worker me): ek saath kitne GetFile parts (viewers ke
+    # beech weighted round-robin), ek viewer (IP + link) ke max connections,
+    # kitne parts (in-flight + queued) ke baad naye /dl ko turant 503, aur
+    # signed link viewers ka weight. 0 = limit band
+    FAIR_PART_SLOTS = int(os.environ.get("FAIR_PART_SLOTS", 128))
+    VIEWER_MAX_CONNECTIONS = int(os.environ.get("VIEWER_MAX_CONNECTIONS", 8))
+    ADMIT_MAX_PARTS = int(os.environ.get("ADMIT_MAX_PARTS", 1024))
+    SIGNED_VIEWER_WEIGHT = int(os.environ.get("SIGNED_VIEWER_WEIGHT", 2))
+    # Trusted proxy (Koyeb/Heroku etc.) ke peeche viewer IP is header (jaise
+    # X-Forwarded-For) ki aakhri entry se. Khali (default) = seedha socket peer:
+    # header client khud bhi bhej sakta hai, to sirf proxy ke peeche set karo
+    REAL_IP_HEADER = os.environ.get("REAL_IP_HEADER", "")
+
+    # Background jobs (caption edits, DB writes, indexing): ek batch me kitne
+    # jobs, batch bharne ke liye kitna ruke (sec), ek saath kitne chalein, ek
+    # chat me Telegram calls/sec (+ burst), aur fail hone pe kitni koshish
+    JOB_BATCH_SIZE = int(os.environ.get("JOB_BATCH_SIZE", 50))
+    JOB_BATCH_DELAY = float(os.environ.get("JOB_BATCH_DELAY", 0.5))
+    JOB_CONCURRENCY = int(os.environ.get("JOB_CONCURRENCY", 4))
+    JOB_CHAT_RATE = float(os.environ.get("JOB_CHAT_RATE", 0.5))
+    JOB_CHAT_BURST = int(os.environ.get("JOB_CHAT_BURST", 5))
+    JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 5))
+
     # Yeh bot ka username store karega (code isse automatic set karega)
     BOT_USERNAME = ""
@@ -1,13 +1,22 @@
 # database.py (UPDATED FOR DUPLICATE CHECKING)
 
+import time
+from datetime import datetime, timedelta, timezone
+
 import motor.motor_asyncio
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 from config import Config
+from metrics import DB_LATENCY, timed
 
 class Database:
     def __init__(self):
         self._client = None
         self.db = None
         self.collection = None
+        self.pending = None
+        self.jobs = None
+        self._pending_local = {}  # DATABASE_URL na ho to: user_id -> (expires_at, data)
         if not Config.DATABASE_URL:
             print("WARNING: DATABASE_URL not set. Links will not be permanent.")
 
@@ -18,10 +27,34 @@ class Database:
             self._client = motor.motor_asyncio.AsyncIOMotorClient(Config.DATABASE_URL)
             self.db = self._client["StreamLinksDB"]
             self.collection = self.db["links"]
+            self.pending = self.db["pending_uploads"]
+            self.jobs = self.db["jobs"]
             print("✅ Database connection established.")
+            await self.ensure_indexes()
         else:
             self.db = None
             self.collection = None
+            self.pending = None
+            self.jobs = None
+
+    async def ensure_indexes(self):
+        """Startup pe zaroori indexes banata aur check karta hai."""
+        try:
+            await self.collection.create_index(
+                "file_unique_id", unique=True, name="file_unique_id_unique"
+            )
+        except (DuplicateKeyError, OperationFailure) as e:
+            # purane duplicate entries hon to unique index nahi banega
+            print(f"WARNING: file_unique_id index not created: {e}")
+        try:
+            await self.pending.create_index(
+                "created_at", expireAfterSeconds=Config.PENDING_UPLOAD_TTL, name="pending_ttl"
+            )
+        except OperationFailure as e:
+            # TTL badla ho to purana index drop karke dobara banana padega
+            print(f"WARNING: pending_uploads TTL index not created: {e}")
+        indexes = await self.collection.index_information()
+        print(f"✅ Indexes: {', '.join(indexes)}")
 
     async def disconnect(self):
         """Database connection ko band karta hai."""
@@ -29,25 +62,128 @@ class Database:
             self._client.close()
             print("Database connection closed.")
 
-    # unique_id (link id), message_id (storage id), and file_unique_id (telegram file id)
-    async def save_link(self, unique_id, message_id, file_unique_id):
+    # links doc: _id (link id), message_id (storage id), file_unique_id (telegram file id)
+    @timed(DB_LATENCY)
+    async def get_file(self, unique_id):
         if self.collection is not None:
-            await self.collection.insert_one({
-                '_id': unique_id, 
-                'message_id': message_id,
-                'file_unique_id': file_unique_id  # Yeh duplicate check ke liye zaroori hai
-            })
+            return await self.collection.find_one(
+                {'_id': unique_id},
+                {
+                    'message_id': 1, 'file_unique_id': 1, 'file_name': 1,
+                    'file_size': 1, 'mime_type': 1,
+                    'media.duration': 1, 'media.container': 1, 'media.codecs': 1,
+                    'media.keyframe_count': 1,
+                },
+            )
+        return None
 
-    async def get_link(self, unique_id):
+    @timed(DB_LATENCY)
+    async def get_media(self, file_unique_id):
+        """Ingest pe bana media index, keyframe table ke bina (/dl ke liye)."""
         if self.collection is not None:
-            doc = await self.collection.find_one({'_id': unique_id})
-            return doc.get('message_id') if doc else None
+            doc = await self.collection.find_one(
+                {'file_unique_id': file_unique_id}, {'_id': 0, 'media.keyframes': 0}
+            )
+            return doc.get('media') if doc else None
         return None
 
+    @timed(DB_LATENCY)
+    async def get_stream_index(self, unique_id):
+        """HLS ke liye: message_id + poora media index (keyframes samet)."""
+        if self.collection is not None:
+            return await self.collection.find_one(
+                {'_id': unique_id}, {'message_id': 1, 'file_unique_id': 1, 'media': 1}
+            )
+        return None
+
+    @timed(DB_LATENCY)
+    async def update_file(self, unique_id, fields):
+        if self.collection is not None:
+            await self.collection.update_one({'_id': unique_id}, {'$set': fields})
+
     # Naya function duplicate check karne ke liye
+    @timed(DB_LATENCY)
     async def find_file(self, file_unique_id):
         if self.collection is not None:
-            return await self.collection.find_one({'file_unique_id': file_unique_id})
+            return await self.collection.find_one(
+                {'file_unique_id': file_unique_id},
+                {'message_id': 1, 'file_name': 1, 'file_size': 1, 'mime_type': 1},
+            )
         return None
 
+    async def bulk_add_files(self, docs):
+        """Bulk import ke liye: naye inserts ki ginti (latency upsert_files me napi jaati hai)."""
+        if self.collection is None or not docs:
+            return 0
+        return len(await self.upsert_files(docs))
+
+    @timed(DB_LATENCY)
+    async def upsert_files(self, docs):
+        """file_unique_id pe batch upsert: jo file_unique_ids sach me naye insert hue unka set."""
+        if self.collection is None:
+            return {d['file_unique_id'] for d in docs}
+        if not docs:
+            return set()
+        ops = [
+            UpdateOne({'file_unique_id': d['file_unique_id']}, {'$setOnInsert': d}, upsert=True)
+            for d in docs
+        ]
+        try:
+            result = await self.collection.bulk_write(ops, ordered=False)
+            upserted = result.upserted_ids.keys()
+        except BulkWriteError as e:
+            # duplicate races: baaki writes ho chuke hain
+            upserted = [u['index'] for u in e.details.get('upserted', [])]
+        return {docs[i]['file_unique_id'] for i in upserted}
+
+    # Background jobs (jobs.py): sirf pending jobs yahan rehte hain
+    @timed(DB_LATENCY)
+    async def save_jobs(self, jobs):
+        if self.jobs is not None and jobs:
+            try:
+                await self.jobs.insert_many(jobs, ordered=False)
+            except BulkWriteError:
+                pass  # pehle se saved (restart ke baad dobara flush)
+
+    @timed(DB_LATENCY)
+    async def reschedule_job(self, job_id, attempts, run_at):
+        if self.jobs is not None:
+            await self.jobs.update_one(
+                {'_id': job_id}, {'$set': {'attempts': attempts, 'run_at': run_at}}
+            )
+
+    @timed(DB_LATENCY)
+    async def delete_jobs(self, job_ids):
+        if self.jobs is not None and job_ids:
+            await self.jobs.delete_many({'_id': {'$in': list(job_ids)}})
+
+    @timed(DB_LATENCY)
+    async def load_jobs(self):
+        if self.jobs is None:
+            return []
+        return await self.jobs.find({}).to_list(length=None)
+
+    # Naam ka intezaar kar rahe uploads (waiting_for_name ki jagah)
+    @timed(DB_LATENCY)
+    async def set_pending(self, user_id, data):
+        if self.pending is not None:
+            doc = {**data, 'created_at': datetime.now(timezone.utc)}
+            await self.pending.replace_one({'_id': user_id}, doc, upsert=True)
+        else:
+            self._pending_local[user_id] = (time.monotonic() + Config.PENDING_UPLOAD_TTL, data)
+
+    @timed(DB_LATENCY)
+    async def pop_pending(self, user_id):
+        if self.pending is not None:
+            # TTL monitor har minute chalta hai, isliye expiry query me bhi check
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=Config.PENDING_UPLOAD_TTL)
+            return await self.pending.find_one_and_delete(
+                {'_id': user_id, 'created_at': {'$gt': cutoff}}
+            )
+        now = time.monotonic()
+        for uid in [u for u, (exp, _) in self._pending_local.items() if exp <= now]:
+            del self._pending_local[uid]
+        entry = self._pending_local.pop(user_id, None)
+        return entry[1] if entry else None
+
 db = Database()
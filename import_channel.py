@@ -0,0 +1,157 @@
+# import_channel.py (bulk re-index of the storage channel into MongoDB)
+#
+# Usage: python3 import_channel.py [--start 1] [--end N] [--concurrency 4]
+# Beech me ruk jaye to dobara chalao, checkpoint se aage shuru hoga.
+
+import os
+import re
+import json
+import time
+import asyncio
+import argparse
+import secrets
+
+from pyrogram import Client
+from pyrogram.errors import FloodWait
+
+from config import Config
+from database import db
+
+BATCH_SIZE = 200  # get_messages ek call me max itne ids leta hai
+CAPTION_NAME = re.compile(r"^Name:\s*(\S.*?)\s*$", re.MULTILINE)
+
+
+def load_checkpoint(path):
+    try:
+        with open(path) as fh:
+            return json.load(fh)["next_id"]
+    except (OSError, ValueError, KeyError):
+        return 1
+
+
+def save_checkpoint(path, next_id):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump({"next_id": next_id}, fh)
+    os.replace(tmp, path)
+
+
+async def fetch_batch(client, ids, state):
+    while True:
+        # FloodWait sab workers ke liye: ek ko mila to baaki bhi ruko
+        wait = state["flood_until"] - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+            continue
+        try:
+            return await client.get_messages(int(Config.STORAGE_CHANNEL), ids)
+        except FloodWait as e:
+            print(f"FloodWait: all workers sleeping {e.value}s")
+            state["flood_until"] = max(state["flood_until"], time.monotonic() + e.value + 1)
+
+
+def file_name_for(msg, media):
+    """Bot ka rakha naam (caption ki `Name:` line, app.py process_name wala format)."""
+    ext = os.path.splitext(media.file_name or "")[1] or ".mkv"
+    match = CAPTION_NAME.search(msg.caption or "")
+    if match:
+        name = match.group(1).replace(" ", "_")
+        return f"[Moviedekhobd.rf.gd] {name} [Moviedekhobd.rf.gd]{ext}"
+    return media.file_name or f"file_{msg.id}"
+
+
+def to_doc(msg):
+    if msg.empty:
+        return None
+    media = msg.document or msg.video or msg.audio
+    if not media:
+        return None
+    return {
+        "_id": secrets.token_urlsafe(8),
+        "message_id": msg.id,
+        "file_unique_id": media.file_unique_id,
+        "file_name": file_name_for(msg, media),
+        "file_size": media.file_size,
+        "mime_type": media.mime_type,
+    }
+
+
+async def run(args):
+    await db.connect()
+    if db.collection is None:
+        print("❌ DATABASE_URL not set, nothing to import into.")
+        return
+
+    client = Client(
+        "StreamBotImport",
+        api_id=Config.API_ID,
+        api_hash=Config.API_HASH,
+        bot_token=Config.BOT_TOKEN,
+        in_memory=True,
+        no_updates=True,
+    )
+    await client.start()
+
+    start = args.start if args.restart else max(args.start, load_checkpoint(args.checkpoint))
+    print(f"🚀 Importing from message {start}...")
+
+    state = {
+        "next": start, "watermark": start, "last_seen": start, "files": 0, "new": 0,
+        "flood_until": 0.0,
+    }
+    done = set()  # batch starts finished out of order
+
+    async def worker():
+        while True:
+            batch_start = state["next"]
+            if args.end and batch_start > args.end:
+                return
+            if not args.end and batch_start > state["last_seen"] + args.gap:
+                # itne ids tak koi message nahi mila: channel khatam
+                return
+            state["next"] += BATCH_SIZE
+            batch_end = batch_start + BATCH_SIZE
+            if args.end:
+                batch_end = min(batch_end, args.end + 1)
+
+            msgs = await fetch_batch(client, list(range(batch_start, batch_end)), state)
+            found = [m.id for m in msgs if not m.empty]
+            if found:
+                state["last_seen"] = max(state["last_seen"], max(found))
+            docs = [d for d in map(to_doc, msgs) if d]
+            if docs:
+                state["new"] += await db.bulk_add_files(docs)
+                state["files"] += len(docs)
+
+            # checkpoint sirf lagatar complete hue batches tak aage badhta hai
+            done.add(batch_start)
+            while state["watermark"] in done:
+                done.remove(state["watermark"])
+                state["watermark"] += BATCH_SIZE
+            save_checkpoint(args.checkpoint, state["watermark"])
+            if (batch_start // BATCH_SIZE) % 50 == 0:
+                print(f"... up to {state['watermark']}: {state['files']} files, {state['new']} new")
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    finally:
+        await client.stop()
+        await db.disconnect()
+    print(f"✅ Import done: {state['files']} files seen, {state['new']} new entries.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-index STORAGE_CHANNEL into MongoDB")
+    parser.add_argument("--start", type=int, default=1, help="first message id")
+    parser.add_argument("--end", type=int, default=0, help="last message id (0 = auto)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--gap", type=int, default=5000, help="stop after this many ids with no message"
+    )
+    parser.add_argument("--checkpoint", default="import_checkpoint.json")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# jobs.py (durable background jobs: caption edits, link bookkeeping, ingest index)
+#
+# Bot handlers copy ke baad turant link bhej dete hain; baaki kaam (caption
+# edit, DB insert, seek index) yahan queue hota hai. Pending jobs Mongo ke
+# `jobs` collection me rehte hain, restart ke baad wahi se chalte hain.
+
+import time
+import heapq
+import asyncio
+import secrets
+import traceback
+
+from pyrogram.errors import FloodWait, BadRequest
+
+from config import Config
+from database import db
+import metrics
+from streaming.rate_limit import RateLimiter
+
+
+class JobQueue:
+    def __init__(self):
+        self.handlers = {}  # kind -> (fn, batch)
+        self.jobs = {}  # job id -> job (pending + running)
+        self._due = []  # heap: (run_at, seq, job id)
+        self._seq = 0
+        self._unsaved = []
+        self._finished = []
+        self._wake = asyncio.Event()
+        self._running = set()
+        self._runner = None
+        self._sem = asyncio.Semaphore(Config.JOB_CONCURRENCY)
+        self._chats = RateLimiter()  # har chat ke Telegram calls ki bucket
+
+    def handler(self, kind, batch=False):
+        """batch=True: handler ko ek saath kai payloads ki list milti hai."""
+
+        def decorator(fn):
+            self.handlers[kind] = (fn, batch)
+            return fn
+
+        return decorator
+
+    async def put(self, kind, payload, chat_id=None, delay=0):
+        """Job queue karo; return hone tak DB me save (restart pe khoya nahi jaata)."""
+        job = {
+            "_id": secrets.token_hex(8),
+            "kind": kind,
+            "payload": payload,
+            "chat_id": chat_id,
+            "attempts": 0,
+            "run_at": time.time() + delay,
+        }
+        try:
+            await db.save_jobs([job])
+        except Exception as e:
+            # Mongo abhi nahi mila: job chalega, save agle flush pe
+            print(f"Job {kind} not saved yet: {e!r}")
+            self._unsaved.append(job)
+        self._schedule(job)
+        return job["_id"]
+
+    def _schedule(self, job):
+        self.jobs[job["_id"]] = job
+        self._seq += 1
+        heapq.heappush(self._due, (job["run_at"], self._seq, job["_id"]))
+        self._wake.set()
+
+    # ==============================================
+    # LIFECYCLE
+    # ==============================================
+    async def start(self):
+        for job in await db.load_jobs():
+            # startup ke dauran handlers ke put kiye jobs DB me bhi hain
+            if job["_id"] not in self.jobs:
+                self._schedule(job)
+        if self.jobs:
+            print(f"✅ Resuming {len(self.jobs)} background jobs")
+        self._runner = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+        for task in list(self._running):
+            task.cancel()
+        # jo chal rahe the wo DB me pending hi hain, agli baar dobara chalenge
+        await self._flush()
+
+    async def _flush(self):
+        unsaved, self._unsaved = self._unsaved, []
+        finished, self._finished = self._finished, []
+        done = set(finished)
+        await db.save_jobs([j for j in unsaved if j["_id"] not in done])
+        await db.delete_jobs(done - {j["_id"] for j in unsaved})
+
+    async def _loop(self):
+        while True:
+            try:
+                delay = self._due[0][0] - time.time() if self._due else None
+                if delay is None or delay > 0:
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                self._wake.clear()
+                # burst me aur jobs aa jayein to ek hi batch me jayenge
+                await asyncio.sleep(Config.JOB_BATCH_DELAY)
+                await self._flush()
+                self._dispatch()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                print(f"Job loop error: {traceback.format_exc()}")
+                await asyncio.sleep(1)
+
+    def _dispatch(self):
+        now = time.time()
+        groups = {}
+        while self._due and self._due[0][0] <= now:
+            _, _, job_id = heapq.heappop(self._due)
+            job = self.jobs.get(job_id)
+            if job is None or job["kind"] not in self.handlers:
+                if job is not None:
+                    print(f"Unknown job kind {job['kind']!r}, dropping")
+                    self._finish(job, "unknown")
+                continue
+            if self.handlers[job["kind"]][1]:
+                batch = groups.setdefault(job["kind"], [[]])
+                if len(batch[-1]) >= Config.JOB_BATCH_SIZE:
+                    batch.append([])
+                batch[-1].append(job)
+            else:
+                groups.setdefault((job["kind"], job_id), [[job]])
+        for batches in groups.values():
+            for jobs in batches:
+                task = asyncio.create_task(self._execute(jobs))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+    # ==============================================
+    # EXECUTION
+    # ==============================================
+    async def _execute(self, jobs):
+        kind = jobs[0]["kind"]
+        fn, batch = self.handlers[kind]
+        chat_id = jobs[0]["chat_id"]
+        async with self._sem:
+            try:
+                if chat_id is not None:
+                    await self._chats.wait(chat_id, Config.JOB_CHAT_RATE, Config.JOB_CHAT_BURST)
+                if batch:
+                    await fn([j["payload"] for j in jobs])
+                else:
+                    await fn(jobs[0]["payload"])
+            except FloodWait as e:
+                # FloodWait koshish nahi ginta: bas us chat ko rok ke baad me
+                if chat_id is not None:
+                    self._chats.pause(chat_id, e.value)
+                for job in jobs:
+                    await self._retry(job, e.value, count=False)
+                return
+            except BadRequest as e:
+                # galat message id / caption: dobara chalane se kuch nahi badlega
+                print(f"Job {kind} failed permanently: {e!r}")
+                for job in jobs:
+                    self._finish(job, "failed")
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Job {kind} failed (attempt {jobs[0]['attempts'] + 1}): {e!r}")
+                for job in jobs:
+                    await self._retry(job, min(5 * 2 ** job["attempts"], 300))
+                return
+        for job in jobs:
+            self._finish(job, "ok")
+
+    async def _retry(self, job, delay, count=True):
+        if count:
+            job["attempts"] += 1
+            if job["attempts"] >= Config.JOB_MAX_ATTEMPTS:
+                print(f"Job {job['kind']} dropped after {job['attempts']} attempts")
+                self._finish(job, "failed")
+                return
+        job["run_at"] = time.time() + delay
+        metrics.JOBS.inc(job["kind"], "retry")
+        self._schedule(job)
+        await db.reschedule_job(job["_id"], job["attempts"], job["run_at"])
+
+    def _finish(self, job, result):
+        self.jobs.pop(job["_id"], None)
+        self._finished.append(job["_id"])
+        metrics.JOBS.inc(job["kind"], result)
+        self._wake.set()  # DB se hatane ke liye flush
+
+
+jobs = JobQueue()
@@ -0,0 +1,133 @@
+# metrics.py (minimal Prometheus text-format metrics, no extra dependency)
+
+import time
+import functools
+from bisect import bisect_left
+
+REGISTRY = []
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{n}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for n, v in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+        REGISTRY.append(self)
+
+    def inc(self, *label_values, amount=1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for label_values, value in self.values.items():
+            yield f"{self.name}{_labels(self.labels, label_values)} {value}"
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.values = {}  # label values -> [bucket counts, sum, count]
+        REGISTRY.append(self)
+
+    def observe(self, value, *label_values):
+        entry = self.values.get(label_values)
+        if entry is None:
+            entry = self.values[label_values] = [[0] * len(self.buckets), 0.0, 0]
+        i = bisect_left(self.buckets, value)
+        if i < len(self.buckets):
+            entry[0][i] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        names = (*self.labels, "le")
+        for label_values, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                yield f"{self.name}_bucket{_labels(names, (*label_values, bound))} {cumulative}"
+            yield f"{self.name}_bucket{_labels(names, (*label_values, '+Inf'))} {count}"
+            yield f"{self.name}_sum{_labels(self.labels, label_values)} {total}"
+            yield f"{self.name}_count{_labels(self.labels, label_values)} {count}"
+
+
+class Collected:
+    """Scrape ke waqt `collect()` se values padhta hai (gauges, baahar ke counters)."""
+
+    def __init__(self, name, help, kind, labels, collect):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labels = labels
+        self.collect = collect
+        REGISTRY.append(self)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for label_values, value in self.collect().items():
+            yield f"{self.name}{_labels(self.labels, label_values)} {value}"
+
+
+def render():
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+def timed(histogram):
+    """Async function ka latency histogram me, function ke naam ke label ke saath."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            started = time.monotonic()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.monotonic() - started, fn.__name__)
+
+        return wrapper
+
+    return decorator
+
+
+GETFILE_LATENCY = Histogram(
+    "streambot_getfile_seconds", "upload.GetFile latency per DC.", ("dc",)
+)
+TTFB = Histogram(
+    "streambot_stream_ttfb_seconds", "Time from /dl request to first body byte sent."
+)
+BYTES_SERVED = Counter("streambot_bytes_served_total", "Body bytes sent by /dl.")
+FLOOD_WAITS = Counter(
+    "streambot_flood_waits_total", "FloodWait errors per client index.", ("client",)
+)
+FLOOD_WAIT_SECONDS = Counter(
+    "streambot_flood_wait_seconds_total", "Seconds of FloodWait per client index.", ("client",)
+)
+ADMISSION_REJECTS = Counter(
+    "streambot_admission_rejects_total", "/dl requests turned away by admission control.",
+    ("reason",),
+)
+JOBS = Counter(
+    "streambot_jobs_total", "Background jobs finished, by kind and result.", ("kind", "result")
+)
+DB_LATENCY = Histogram(
+    "streambot_mongo_query_seconds", "Database method latency.", ("method",)
+)
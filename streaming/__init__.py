@@ -0,0 +1,40 @@
+# streaming (the one /dl engine; app.py and webserver.py both serve through it)
+#
+#   ranges.py       - Range header parsing + part planner (part size, cuts)
+#   streamer.py     - part fetcher: metadata cache, GetFile, read-ahead
+#   sessions.py     - media sessions per DC
+#   probe.py        - MP4 moov / MKV cues parsing at ingest
+#   media_index.py  - seek index lookup + pinned header/index bytes
+#   hls.py          - VOD HLS playlist + fMP4 segments (fmp4.py, remux.py)
+#   response.py     - response writer (headers, 206/304/416, backpressure)
+#   tokens.py       - HMAC-signed /dl + /api/file links
+#   pool.py         - bot client pool and load-based scheduling
+#   fair.py         - per-viewer fair part slots + /dl admission control
+
+from .pool import (
+    multi_clients,
+    work_loads,
+    inflight_bytes,
+    flood_until,
+    class_cache,
+    shared_load,
+    setup_crypto_executor,
+    start_clients,
+    stop_clients,
+)
+from .ranges import dc_stats
+from .chunk_cache import chunk_cache
+from .shared_load import acquire_bot_lock
+from .streamer import (
+    SingleFlight,
+    ByteStreamer,
+    part_flights,
+    get_streamer,
+    acquire_streamer,
+    prewarm_media_sessions,
+)
+from .fair import scheduler
+from .response import ByteStreamResponse, serve_media, options_response
+from .media_index import index_file, get_index, pinned
+from .tokens import sign_link, verify_link
+from .hls import hls_playlist, hls_init, hls_segment, hls_supported, hls_unsupported_audio
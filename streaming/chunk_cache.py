@@ -0,0 +1,172 @@
+# streaming/chunk_cache.py (shared on-disk cache for streamed file parts)
+
+import os
+import mmap
+import asyncio
+import secrets
+from collections import OrderedDict
+
+from config import Config
+
+
+class ChunkCache:
+    """Aligned GetFile parts stored on disk, keyed by file_unique_id + offset."""
+
+    def __init__(self, root, max_bytes, policy="lru"):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.policy = policy
+        # (file_unique_id, offset, limit) -> [size, hits]; order = recency
+        self._index = OrderedDict()
+        # LFU: hits -> keys (purane pehle), taaki eviction pe poora index scan na ho
+        self._buckets = {}
+        self._used = 0
+        self._opened = False
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self._opened and bool(self.root) and self.max_bytes > 0
+
+    def open(self, worker=None, workers=1):
+        """Startup (lifespan) pe: directory banao aur disk ke parts ka index.
+
+        Multi-worker me index har process ka apna hai, isliye har worker ko
+        apni sub-directory aur max_bytes / workers ka budget milta hai: kul
+        disk budget wahi rehta hai aur koi worker doosre ki files evict nahi
+        karta (cost: ek worker ka cached part doosre ko nahi milta).
+        """
+        if self._opened:
+            return
+        self._opened = True
+        if worker is not None and workers > 1:
+            self.root = os.path.join(self.root, f"worker{worker}")
+            self.max_bytes //= workers
+        if self.enabled:
+            self._load()
+
+    def _path(self, uid, offset, limit):
+        return os.path.join(self.root, uid, f"{offset}_{limit}.part")
+
+    def _load(self):
+        """Disk pe pehle se jo parts hain unka index banata hai (oldest first)."""
+        os.makedirs(self.root, exist_ok=True)
+        entries = []
+        for uid in os.listdir(self.root):
+            folder = os.path.join(self.root, uid)
+            if not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                if not name.endswith(".part"):
+                    continue
+                try:
+                    offset, limit = map(int, name[:-5].split("_"))
+                    st = os.stat(os.path.join(folder, name))
+                except (ValueError, OSError):
+                    continue
+                entries.append((st.st_mtime, (uid, offset, limit), st.st_size))
+        for _, key, size in sorted(entries):
+            self._add(key, size)
+        self._evict()
+        print(f"✅ Chunk cache ready: {len(self._index)} parts, {self._used} bytes")
+
+    def has(self, uid, offset, limit):
+        return (uid, offset, limit) in self._index
+
+    async def get(self, uid, offset, limit):
+        if not self.enabled:
+            return None
+        key = (uid, offset, limit)
+        entry = self._index.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        try:
+            data = await asyncio.to_thread(self._read, self._path(*key))
+        except (OSError, ValueError):
+            self._drop(key)
+            self.misses += 1
+            return None
+        self._touch(key, entry)
+        self.hits += 1
+        return data
+
+    async def put(self, uid, offset, limit, data):
+        key = (uid, offset, limit)
+        if not self.enabled or not data or key in self._index:
+            return
+        if len(data) > self.max_bytes:
+            return
+        try:
+            await asyncio.to_thread(self._write, self._path(*key), data)
+        except OSError as e:
+            print(f"Chunk cache write error: {e}")
+            return
+        if key in self._index:
+            # kisi aur stream ne isi beech same part likh diya
+            return
+        self._add(key, len(data))
+        self._evict()
+
+    @staticmethod
+    def _read(path):
+        # map khula rehta hai jab tak view zinda hai: response bina copy ke
+        # page cache se jaata hai (file delete ho jaye tab bhi map valid)
+        with open(path, "rb") as fh:
+            return memoryview(mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @staticmethod
+    def _write(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{secrets.token_hex(4)}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+
+    def _add(self, key, size):
+        self._index[key] = [size, 0]
+        self._used += size
+        if self.policy == "lfu":
+            self._buckets.setdefault(0, OrderedDict())[key] = None
+
+    def _touch(self, key, entry):
+        self._index.move_to_end(key)
+        if self.policy == "lfu":
+            self._unbucket(key, entry[1])
+            self._buckets.setdefault(entry[1] + 1, OrderedDict())[key] = None
+        entry[1] += 1
+
+    def _unbucket(self, key, hits):
+        bucket = self._buckets.get(hits)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self._buckets[hits]
+
+    def _evict(self):
+        while self._used > self.max_bytes and self._index:
+            if self.policy == "lfu":
+                # sabse kam hits; ties me jo us bucket me sabse pehle aaya
+                key = next(iter(self._buckets[min(self._buckets)]))
+            else:
+                key = next(iter(self._index))
+            self._drop(key)
+
+    def _drop(self, key):
+        entry = self._index.pop(key, None)
+        if entry is None:
+            return
+        if self.policy == "lfu":
+            self._unbucket(key, entry[1])
+        self._used -= entry[0]
+        try:
+            os.remove(self._path(*key))
+        except OSError:
+            pass
+
+
+# disk ka kaam `chunk_cache.open()` me, import pe nahi
+chunk_cache = ChunkCache(
+    Config.CHUNK_CACHE_DIR, Config.CHUNK_CACHE_MAX_BYTES, Config.CHUNK_CACHE_POLICY
+)
@@ -0,0 +1,131 @@
+# streaming/fair.py (per-viewer fair share of GetFile parts + /dl admission control)
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+from config import Config
+import metrics
+
+RETRY_AFTER = 2  # sec, overload pe 503/429 ke saath
+
+
+class Viewer:
+    """Ek viewer (IP + link) ke saare connections: ek hi queue, ek hi turn."""
+
+    __slots__ = ("key", "weight", "credit", "connections", "waiters")
+
+    def __init__(self, key, weight):
+        self.key = key
+        self.weight = weight
+        self.credit = weight
+        self.connections = 0
+        self.waiters = deque()  # part slot ka intezaar kar rahe futures
+
+
+class FairScheduler:
+    """GetFile slots viewers me weighted round-robin se baant-ta hai.
+
+    16 Range connections wala download manager bhi ek viewer hai: har turn
+    pe use `weight` parts milte hain, baaki viewers ki baari aati rahti hai.
+    """
+
+    def __init__(self, slots, max_connections, max_parts):
+        self.slots = slots
+        self.max_connections = max_connections
+        self.max_parts = max_parts
+        self.viewers = {}
+        self.ready = deque()  # waiters wale viewers, round-robin order me
+        self.internal = Viewer("internal", 1)  # ingest probe, pinned regions
+        self.inflight = 0
+        self.waiting = 0
+
+    # ===== Admission =====
+    def admit(self, key, weight=1):
+        """Naya /dl ya /hls request; overload ya connection cap pe turant reject."""
+        if self.max_parts > 0 and self.inflight + self.waiting >= self.max_parts:
+            metrics.ADMISSION_REJECTS.inc("overload")
+            raise HTTPException(
+                503, detail="Server busy, try again shortly.",
+                headers={"Retry-After": str(RETRY_AFTER)},
+            )
+        viewer = self.viewers.get(key)
+        if viewer is None:
+            viewer = self.viewers[key] = Viewer(key, weight)
+        if self.max_connections > 0 and viewer.connections >= self.max_connections:
+            metrics.ADMISSION_REJECTS.inc("connections")
+            raise HTTPException(
+                429, detail="Too many connections for this link.",
+                headers={"Retry-After": str(RETRY_AFTER)},
+            )
+        viewer.connections += 1
+        return viewer
+
+    def leave(self, viewer):
+        viewer.connections -= 1
+        if viewer.connections <= 0 and not viewer.waiters:
+            self.viewers.pop(viewer.key, None)
+
+    # ===== Part slots =====
+    @asynccontextmanager
+    async def slot(self, viewer=None):
+        await self._acquire(viewer or self.internal)
+        try:
+            yield
+        finally:
+            self.inflight -= 1
+            self._grant()
+
+    async def _acquire(self, viewer):
+        if self.slots <= 0 or (self.inflight < self.slots and not self.ready):
+            self.inflight += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        viewer.waiters.append(fut)
+        self.waiting += 1
+        if len(viewer.waiters) == 1:
+            self.ready.append(viewer)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # slot mil chuka tha, lekin lene wala chala gaya
+                self.inflight -= 1
+                self._grant()
+            elif fut in viewer.waiters:
+                viewer.waiters.remove(fut)
+                self.waiting -= 1
+                if not viewer.waiters:
+                    self.ready.remove(viewer)
+                    self._forget(viewer)
+            raise
+
+    def _grant(self):
+        while self.ready and (self.slots <= 0 or self.inflight < self.slots):
+            viewer = self.ready[0]
+            fut = viewer.waiters.popleft()
+            self.waiting -= 1
+            viewer.credit -= 1
+            if not viewer.waiters:
+                self.ready.popleft()
+                viewer.credit = viewer.weight
+                self._forget(viewer)
+            elif viewer.credit <= 0:
+                # is viewer ki turn khatam, agle ki baari
+                viewer.credit = viewer.weight
+                self.ready.rotate(-1)
+            if fut.done():
+                continue  # waiter cancel ho chuka, slot agle ko
+            self.inflight += 1
+            fut.set_result(None)
+
+    def _forget(self, viewer):
+        if viewer.connections <= 0 and viewer is not self.internal:
+            self.viewers.pop(viewer.key, None)
+
+
+scheduler = FairScheduler(
+    Config.FAIR_PART_SLOTS, Config.VIEWER_MAX_CONNECTIONS, Config.ADMIT_MAX_PARTS
+)
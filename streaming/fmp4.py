@@ -0,0 +1,136 @@
+# streaming/fmp4.py (fragmented MP4 writer for HLS: init + moof/mdat segments)
+
+import struct
+
+MATRIX = struct.pack(">9I", 0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000)
+SYNC_FLAGS = 0x02000000  # sample_depends_on = 2 (I-frame)
+NON_SYNC_FLAGS = 0x01010000  # depends_on = 1, is_non_sync_sample
+
+
+def box(kind, *payload):
+    data = b"".join(payload)
+    return struct.pack(">I4s", 8 + len(data), kind) + data
+
+
+def full_box(kind, version, flags, *payload):
+    return box(kind, struct.pack(">I", (version << 24) | flags), *payload)
+
+
+# ==============================================
+# SAMPLE ENTRIES (stsd)
+# ==============================================
+def visual_entry(fourcc, width, height, config):
+    """avc1/hvc1 sample entry; `config` = avcC/hvcC box."""
+    return box(
+        fourcc,
+        bytes(6), struct.pack(">H", 1),  # data_reference_index
+        bytes(16),
+        struct.pack(">HHIIIH", width, height, 0x480000, 0x480000, 0, 1),
+        bytes(32),  # compressorname
+        struct.pack(">Hh", 0x18, -1),
+        config,
+    )
+
+
+def _descriptor(tag, payload):
+    n = len(payload)
+    return bytes([tag, 0x80 | (n >> 21) & 0x7F, 0x80 | (n >> 14) & 0x7F,
+                  0x80 | (n >> 7) & 0x7F, n & 0x7F]) + payload
+
+
+def mp4a_entry(sample_rate, channels, audio_specific_config):
+    dsi = _descriptor(5, audio_specific_config)
+    dcd = _descriptor(4, bytes([0x40, 0x15]) + bytes(3) + bytes(8) + dsi)
+    esd = _descriptor(3, bytes(3) + dcd + _descriptor(6, b"\x02"))
+    return box(
+        b"mp4a",
+        bytes(6), struct.pack(">H", 1),
+        bytes(8),
+        struct.pack(">HHHHI", channels, 16, 0, 0, int(sample_rate) << 16),
+        full_box(b"esds", 0, 0, esd),
+    )
+
+
+AAC_RATES = (96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050, 16000, 12000, 11025, 8000, 7350)
+
+
+def aac_config(sample_rate, channels):
+    """AAC-LC AudioSpecificConfig jab container me na ho."""
+    rates = [abs(r - sample_rate) for r in AAC_RATES]
+    index = rates.index(min(rates))
+    return struct.pack(">H", (2 << 11) | (index << 7) | (channels << 3))
+
+
+# ==============================================
+# INIT SEGMENT
+# ==============================================
+def _trak(track):
+    video = track["kind"] == b"vide"
+    tkhd = full_box(
+        b"tkhd", 0, 3,
+        struct.pack(">IIIII", 0, 0, track["id"], 0, 0),
+        bytes(8),
+        struct.pack(">hhhH", 0, 0, 0 if video else 0x100, 0),
+        MATRIX,
+        struct.pack(">II", track.get("width", 0) << 16, track.get("height", 0) << 16),
+    )
+    mdhd = full_box(b"mdhd", 0, 0, struct.pack(">IIIIHH", 0, 0, track["timescale"], 0, 0x55C4, 0))
+    name = b"VideoHandler\0" if video else b"SoundHandler\0"
+    hdlr = full_box(b"hdlr", 0, 0, bytes(4), track["kind"], bytes(12), name)
+    header = full_box(b"vmhd", 0, 1, bytes(8)) if video else full_box(b"smhd", 0, 0, bytes(4))
+    dinf = box(b"dinf", full_box(b"dref", 0, 0, struct.pack(">I", 1), full_box(b"url ", 0, 1)))
+    stbl = box(
+        b"stbl",
+        full_box(b"stsd", 0, 0, struct.pack(">I", 1), track["entry"]),
+        full_box(b"stts", 0, 0, bytes(4)),
+        full_box(b"stsc", 0, 0, bytes(4)),
+        full_box(b"stsz", 0, 0, bytes(8)),
+        full_box(b"stco", 0, 0, bytes(4)),
+    )
+    return box(b"trak", tkhd, box(b"mdia", mdhd, hdlr, box(b"minf", header, dinf, stbl)))
+
+
+def init_segment(tracks):
+    mvhd = full_box(
+        b"mvhd", 0, 0,
+        struct.pack(">IIIIIH", 0, 0, 1000, 0, 0x10000, 0x100),
+        bytes(10), MATRIX, bytes(24),
+        struct.pack(">I", max(t["id"] for t in tracks) + 1),
+    )
+    trex = [
+        full_box(b"trex", 0, 0, struct.pack(">IIIII", t["id"], 1, 0, 0, 0)) for t in tracks
+    ]
+    return box(b"ftyp", b"iso6", bytes(4), b"iso6mp41") + box(
+        b"moov", mvhd, *(_trak(t) for t in tracks), box(b"mvex", *trex)
+    )
+
+
+# ==============================================
+# MEDIA SEGMENT
+# ==============================================
+def _moof(seq, fragments, data_offsets):
+    trafs = []
+    for (track_id, base_dts, samples, _), offset in zip(fragments, data_offsets):
+        entries = b"".join(struct.pack(">IIIi", *s) for s in samples)
+        trafs.append(box(
+            b"traf",
+            full_box(b"tfhd", 0, 0x020000, struct.pack(">I", track_id)),  # default-base-is-moof
+            full_box(b"tfdt", 1, 0, struct.pack(">Q", max(0, base_dts))),
+            # data offset, duration, size, flags, signed composition offset
+            full_box(b"trun", 1, 0xF01, struct.pack(">Ii", len(samples), offset), entries),
+        ))
+    return box(b"moof", full_box(b"mfhd", 0, 0, struct.pack(">I", seq)), *trafs)
+
+
+def media_segment(seq, fragments):
+    """fragments: [(track_id, base_dts, [(duration, size, flags, cts)], data)]."""
+    fragments = [f for f in fragments if f[2]]
+    moof_size = len(_moof(seq, fragments, [0] * len(fragments)))
+    offsets, pos = [], moof_size + 8
+    for fragment in fragments:
+        offsets.append(pos)
+        pos += len(fragment[3])
+    mdat = [fragment[3] for fragment in fragments]
+    return b"".join(
+        [_moof(seq, fragments, offsets), struct.pack(">I4s", pos - moof_size, b"mdat"), *mdat]
+    )
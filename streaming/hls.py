@@ -0,0 +1,225 @@
+# streaming/hls.py (VOD HLS: playlist from the seek index, fMP4 segments via ByteStreamer)
+
+import math
+import time
+import asyncio
+import traceback
+from collections import OrderedDict
+
+from pyrogram.errors import FloodWait, BadRequest
+from fastapi import Request, HTTPException
+from fastapi.responses import Response
+
+from config import Config
+from database import db
+from .streamer import SingleFlight, acquire_streamer
+from .media_index import read_range, region_bytes
+from .http_cache import cache_control_for
+from .fair import scheduler
+from .response import viewer_key
+from .remux import Mp4Source, MkvSource, cluster_end
+
+PLAYLIST_TYPE = "application/vnd.apple.mpegurl"
+HLS_VIDEO_CODECS = ("avc1", "avc3", "hvc1", "hev1")
+VIDEO_CODECS = HLS_VIDEO_CODECS + ("vp8", "vp09", "av01", "mp4v", "dvh", "V_")
+# remux sirf AAC audio likhta hai (MKV ke unmapped ids "A_AAC/..." jaise rehte hain)
+HLS_AUDIO_CODECS = ("mp4a.40.2", "A_AAC")
+
+plans = OrderedDict()  # unique_id -> (expires_at, plan)
+plan_flights = SingleFlight()
+sources = OrderedDict()  # file_unique_id -> Mp4Source / MkvSource
+source_flights = SingleFlight()
+segment_flights = SingleFlight()
+
+
+def hls_unsupported_audio(media):
+    """Audio hai par ek bhi AAC track nahi (AC3/EAC3/DTS...): remux use chhod deta,
+    to HLS bina awaaz ka hota. Aise files /dl only rehte hain; non-AAC list deta hai."""
+    audio = [c for c in media.get("codecs", ()) if not c.startswith(VIDEO_CODECS)]
+    if audio and not any(c.startswith(HLS_AUDIO_CODECS) for c in audio):
+        return audio
+    return []
+
+
+def hls_supported(media):
+    """Link dikhane layak HLS: keyframes (Cues / stss) bhi chahiye, warna playlist 404."""
+    return bool(
+        media
+        and media.get("keyframe_count")
+        and media.get("container") in ("mp4", "matroska", "webm")
+        and any(c.startswith(HLS_VIDEO_CODECS) for c in media.get("codecs", ()))
+        and not hls_unsupported_audio(media)
+    )
+
+
+def plan_segments(keyframes, duration, target):
+    """Keyframes ko ~target sec ke segments me: [(start sec, byte offset, duration)]."""
+    # MKV me ek cluster ke kai cues ho sakte hain: offset ka pehla time hi
+    # cluster ka start hai
+    starts = {}
+    for t, off in keyframes:
+        starts.setdefault(off, t)
+    points = []
+    for off, t in sorted(starts.items()):
+        if points and t - points[-1][0] < target:
+            continue
+        points.append((t, off))
+    segments = []
+    for i, (t, off) in enumerate(points):
+        end = points[i + 1][0] if i + 1 < len(points) else max(duration, t + 0.001)
+        segments.append((t, off, end - t))
+    return segments
+
+
+def render_playlist(segments):
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:7",
+        f"#EXT-X-TARGETDURATION:{math.ceil(max(d for _, _, d in segments))}",
+        "#EXT-X-PLAYLIST-TYPE:VOD",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+        "#EXT-X-INDEPENDENT-SEGMENTS",
+        '#EXT-X-MAP:URI="init.mp4"',
+    ]
+    for i, (_, _, duration) in enumerate(segments):
+        lines += [f"#EXTINF:{duration:.3f},", f"{i}.m4s"]
+    lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
+
+
+async def get_plan(unique_id):
+    entry = plans.get(unique_id)
+    if entry and entry[0] > time.monotonic():
+        plans.move_to_end(unique_id)
+        return entry[1]
+    return await plan_flights.do(unique_id, lambda: _build_plan(unique_id))
+
+
+async def _build_plan(unique_id):
+    doc = await db.get_stream_index(unique_id)
+    if not doc:
+        raise HTTPException(404, detail="Link expired or invalid.")
+    media = doc.get("media")
+    if not hls_supported(media) or not media.get("keyframes"):
+        raise HTTPException(404, detail="HLS is not available for this file.")
+    segments = plan_segments(media["keyframes"], media["duration"], Config.HLS_SEGMENT_SECONDS)
+    plan = {
+        "mid": doc["message_id"],
+        "media": media,
+        "segments": segments,
+        "playlist": render_playlist(segments).encode(),
+    }
+    plans[unique_id] = (time.monotonic() + Config.MEDIA_CACHE_TTL, plan)
+    plans.move_to_end(unique_id)
+    while len(plans) > Config.MEDIA_CACHE_SIZE:
+        plans.popitem(last=False)
+    return plan
+
+
+async def get_source(st, props, media, viewer=None):
+    uid = props["file_unique_id"]
+    source = sources.get(uid)
+    if source is not None:
+        sources.move_to_end(uid)
+        return source
+    return await source_flights.do(uid, lambda: _load_source(st, props, media, viewer))
+
+
+async def _load_source(st, props, media, viewer):
+    if media["container"] == "mp4":
+        # sample tables moov me hain (index region)
+        moov = await region_bytes(st, props, media["index"], viewer)
+        source = await asyncio.to_thread(Mp4Source.parse, moov)
+    else:
+        head = await region_bytes(st, props, media["header"], viewer)
+        source = await asyncio.to_thread(MkvSource.parse, head)
+    if source is None:
+        raise HTTPException(404, detail="HLS is not available for this file.")
+    sources[props["file_unique_id"]] = source
+    while len(sources) > Config.HLS_SOURCE_CACHE:
+        sources.popitem(last=False)
+    return source
+
+
+async def _streamer_props(plan):
+    st = await acquire_streamer()
+    return st, await st.get_file_properties(plan["mid"])
+
+
+async def _build_init(plan, viewer):
+    st, props = await _streamer_props(plan)
+    return (await get_source(st, props, plan["media"], viewer)).init_segment()
+
+
+async def _build_segment(plan, n, viewer):
+    st, props = await _streamer_props(plan)
+    source = await get_source(st, props, plan["media"], viewer)
+    segments = plan["segments"]
+
+    async def read(start, end):
+        return await read_range(st, props, start, end, viewer)
+
+    if isinstance(source, Mp4Source):
+        t0 = None if n == 0 else segments[n][0]
+        t1 = segments[n + 1][0] if n + 1 < len(segments) else None
+        return await source.segment(read, n + 1, t0, t1)
+
+    start = segments[n][1]
+    if n + 1 < len(segments):
+        end = segments[n + 1][1] - 1
+        # agle segment ke pehle keyframe tak ke blocks bhi isi segment ke hain
+        lookahead = await cluster_end(read, segments[n + 1][1], Config.PROBE_MAX_BYTES)
+    else:
+        index = plan["media"].get("index")
+        end = index[0] - 1 if index and index[0] > start else props["file_size"] - 1
+        lookahead = end
+    return await source.segment(read, n + 1, start, end, lookahead, first=n == 0)
+
+
+async def _respond(build, media_type, cache_control):
+    try:
+        body = await build()
+    except HTTPException:
+        raise
+    except FloodWait as e:
+        raise HTTPException(503, headers={"Retry-After": str(e.value)})
+    except (FileNotFoundError, BadRequest):
+        raise HTTPException(404)
+    except Exception:
+        print(f"Error in /hls route: {traceback.format_exc()}")
+        raise HTTPException(500)
+    return Response(body, media_type=media_type, headers={"Cache-Control": cache_control})
+
+
+async def hls_playlist(unique_id):
+    async def build():
+        return (await get_plan(unique_id))["playlist"]
+
+    return await _respond(build, PLAYLIST_TYPE, f"public, max-age={Config.API_CACHE_TTL}")
+
+
+async def _respond_viewer(r, unique_id, build):
+    """/dl jaisa admission: har player apna viewer, uske GetFile parts fair queue me."""
+    viewer = scheduler.admit(viewer_key(r, unique_id))
+    try:
+        return await _respond(lambda: build(viewer), "video/mp4", cache_control_for("video/mp4"))
+    finally:
+        scheduler.leave(viewer)
+
+
+async def hls_init(r: Request, unique_id):
+    async def build(viewer):
+        plan = await get_plan(unique_id)
+        return await segment_flights.do((unique_id, "init"), lambda: _build_init(plan, viewer))
+
+    return await _respond_viewer(r, unique_id, build)
+
+
+async def hls_segment(r: Request, unique_id, n):
+    async def build(viewer):
+        plan = await get_plan(unique_id)
+        if not 0 <= n < len(plan["segments"]):
+            raise HTTPException(404)
+        return await segment_flights.do((unique_id, n), lambda: _build_segment(plan, n, viewer))
+
+    return await _respond_viewer(r, unique_id, build)
@@ -0,0 +1,66 @@
+# streaming/http_cache.py (validators and Cache-Control for /dl, RFC 7232)
+
+from email.utils import formatdate, parsedate_to_datetime
+
+from config import Config
+
+
+def make_etag(file_unique_id, size):
+    """Strong ETag: same Telegram file + same size = same bytes."""
+    return f'"{file_unique_id}-{size}"'
+
+
+def http_date(timestamp):
+    return formatdate(timestamp, usegmt=True)
+
+
+def _parse_date(value):
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _etag_list(value):
+    return [tag.strip() for tag in value.split(",") if tag.strip()]
+
+
+def is_not_modified(headers, etag, last_modified):
+    """GET/HEAD ke liye 304 bhejna hai ya nahi.
+
+    If-None-Match (weak comparison) ho to If-Modified-Since ignore hota hai.
+    """
+    inm = headers.get("If-None-Match")
+    if inm is not None:
+        tags = _etag_list(inm)
+        return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+    ims = headers.get("If-Modified-Since")
+    if ims and last_modified is not None:
+        since = _parse_date(ims)
+        return since is not None and int(last_modified) <= since
+    return False
+
+
+def if_range_matches(headers, etag, last_modified):
+    """False ho to Range ignore karke poori file (200) bhejni hai."""
+    value = headers.get("If-Range")
+    if not value:
+        return True
+    value = value.strip()
+    if value.startswith('"') or value.startswith("W/"):
+        # If-Range me sirf strong match chalta hai
+        return value == etag
+    since = _parse_date(value)
+    return since is not None and last_modified is not None and int(last_modified) == since
+
+
+def cache_control_for(content_type):
+    """CACHE_CONTROL rules me se content type ki policy (`video/*`, exact, ya `*`)."""
+    rules = Config.CACHE_CONTROL
+    main_type = content_type.split("/", 1)[0]
+    return (
+        rules.get(content_type)
+        or rules.get(f"{main_type}/*")
+        or rules.get("*")
+        or "no-cache"
+    )
@@ -0,0 +1,145 @@
+# streaming/media_index.py (ingest-time seek index + pinned header/index bytes)
+
+import time
+import struct
+import asyncio
+from collections import OrderedDict
+
+from config import Config
+from database import db
+from .probe import probe, ProbeError
+from .streamer import SingleFlight, acquire_streamer
+
+indexes = OrderedDict()  # file_unique_id -> (expires_at, media dict or None)
+INDEX_MISS_TTL = 5  # sec, index na mile to itni der baad dobara Mongo
+index_flights = SingleFlight()
+warming = {}  # file_unique_id -> background get_index task (cached_index miss)
+
+
+async def read_range(st, props, start, end, viewer=None):
+    return b"".join([chunk async for chunk in st.yield_range(props, start, end, viewer)])
+
+
+async def probe_file(st, props):
+    async def read(start, end):
+        return await read_range(st, props, start, end)
+
+    try:
+        return await probe(read, props["file_size"], Config.PROBE_MAX_BYTES)
+    except (ProbeError, struct.error, IndexError, ValueError) as e:
+        print(f"Probe failed for {props['file_unique_id']}: {e!r}")
+        return None
+
+
+async def index_file(unique_id, mid):
+    """Ingest stage: naye file ka header + seek index padh ke links doc me "media"."""
+    st = await acquire_streamer()
+    props = await st.get_file_properties(mid)
+    media = await probe_file(st, props)
+    if media is None:
+        return None
+    # keyframes projections me nahi aate; HLS link banane wale count dekhte hain
+    media["keyframe_count"] = len(media["keyframes"])
+    await db.update_file(unique_id, {"media": media, "mime_type": media["mime_type"]})
+    remember(props["file_unique_id"], {k: v for k, v in media.items() if k != "keyframes"})
+    return media
+
+
+def remember(file_unique_id, media):
+    # abhi index nahi (ingest job chal raha ho sakta hai): miss thodi der hi yaad
+    ttl = Config.MEDIA_CACHE_TTL if media is not None else INDEX_MISS_TTL
+    indexes[file_unique_id] = (time.monotonic() + ttl, media)
+    indexes.move_to_end(file_unique_id)
+    while len(indexes) > Config.MEDIA_CACHE_SIZE:
+        indexes.popitem(last=False)
+
+
+async def get_index(file_unique_id):
+    """/dl ke liye media info (bina keyframes); index na ho to None."""
+    entry = indexes.get(file_unique_id)
+    if entry and entry[0] > time.monotonic():
+        indexes.move_to_end(file_unique_id)
+        return entry[1]
+    return await index_flights.do(file_unique_id, lambda: _load_index(file_unique_id))
+
+
+def cached_index(file_unique_id):
+    """Sirf memory cache, kabhi wait nahi (signed /dl); miss pe index background me
+    load hota hai taaki agli requests ko mile."""
+    entry = indexes.get(file_unique_id)
+    if entry and entry[0] > time.monotonic():
+        indexes.move_to_end(file_unique_id)
+        return entry[1]
+    if file_unique_id not in warming:
+        task = warming[file_unique_id] = asyncio.ensure_future(get_index(file_unique_id))
+        task.add_done_callback(lambda t: _warmed(file_unique_id, t))
+    return None
+
+
+def _warmed(file_unique_id, task):
+    warming.pop(file_unique_id, None)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Index load failed for {file_unique_id}: {task.exception()!r}")
+
+
+async def _load_index(file_unique_id):
+    media = await db.get_media(file_unique_id)
+    remember(file_unique_id, media)
+    return media
+
+
+class PinnedBuffers:
+    """Header/index regions ke bytes memory me (LRU, max_bytes tak)."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._regions = OrderedDict()  # (file_unique_id, start) -> bytes
+        self._flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, st, props, region):
+        key = (props["file_unique_id"], region[0])
+        data = self._regions.get(key)
+        if data is not None:
+            self._regions.move_to_end(key)
+            self.hits += 1
+            return data
+        self.misses += 1
+        return await self._flights.do(key, lambda: self._load(st, props, key, region))
+
+    async def _load(self, st, props, key, region):
+        data = await read_range(st, props, *region)
+        self._regions[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes and self._regions:
+            _, old = self._regions.popitem(last=False)
+            self.size -= len(old)
+        return data
+
+
+pinned = PinnedBuffers(Config.PIN_CACHE_BYTES)
+
+
+async def region_bytes(st, props, region, viewer=None):
+    """Header/index region ke bytes; chhota ho to pinned buffer se."""
+    if Config.PIN_CACHE_BYTES > 0 and region[1] - region[0] + 1 <= Config.PIN_REGION_MAX_BYTES:
+        return await pinned.get(st, props, region)
+    return await read_range(st, props, *region, viewer)
+
+
+async def pinned_range(st, props, media, fb, ub):
+    """[fb, ub] header ya index region ke andar ho to pinned bytes ka view."""
+    if not media or Config.PIN_CACHE_BYTES <= 0:
+        return None
+    for region in (media.get("header"), media.get("index")):
+        if (
+            region
+            and region[0] <= fb
+            and ub <= region[1]
+            and region[1] - region[0] + 1 <= Config.PIN_REGION_MAX_BYTES
+        ):
+            data = await pinned.get(st, props, region)
+            return memoryview(data)[fb - region[0]:ub - region[0] + 1]
+    return None
@@ -0,0 +1,98 @@
+# streaming/pool.py (bot client pool, load accounting and scheduling)
+
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pyrogram
+from pyrogram import Client
+
+from config import Config
+import metrics
+from .shared_load import SharedLoad
+
+multi_clients = {}
+work_loads = {}  # active streams per client
+inflight_bytes = {}  # GetFile bytes currently requested per client
+flood_until = {}  # client index -> time.monotonic() when its FloodWait ends
+class_cache = {}  # client -> ByteStreamer
+shared_load = SharedLoad(Config.LOAD_SHM_PATH)  # WORKERS > 1 pe hi attach hota hai
+
+
+def setup_crypto_executor():
+    """MTProto pack/unpack (AES-IGE) ko CRYPTO_WORKERS threads pe chalata hai.
+
+    Pyrogram sessions har packet `pyrogram.crypto_executor` me decrypt karte
+    hain, jo default me sirf ek thread hai. tgcrypto GIL chhod deta hai, isliye
+    zyada threads = zyada cores, aur event loop HTTP ke liye free rehta hai.
+    """
+    if Config.CRYPTO_WORKERS > 1:
+        pyrogram.crypto_executor = ThreadPoolExecutor(
+            Config.CRYPTO_WORKERS, thread_name_prefix="CryptoWorker"
+        )
+
+
+def add_client(index, client):
+    multi_clients[index] = client
+    work_loads[index] = 0
+    inflight_bytes[index] = 0
+
+
+async def start_clients(primary):
+    """`primary` (already started) index 0 pe, MULTI_BOT_TOKENS 1.. pe."""
+    add_client(0, primary)
+
+    async def start_client(index, token):
+        try:
+            c = Client(
+                f"StreamBot{index}",
+                api_id=Config.API_ID,
+                api_hash=Config.API_HASH,
+                bot_token=token,
+                in_memory=True,
+                no_updates=True,
+            )
+            await c.start()
+            add_client(index, c)
+            print(f"✅ Client {index} started")
+        except Exception as e:
+            print(f"❌ Client {index} failed to start: {e}")
+
+    await asyncio.gather(
+        *(start_client(n, t) for n, t in enumerate(Config.MULTI_BOT_TOKENS, start=1))
+    )
+
+
+async def stop_clients():
+    shared_load.close()
+    for c in multi_clients.values():
+        if c in class_cache:
+            await class_cache[c].sessions.close()
+        if c.is_initialized:
+            await c.stop()
+
+
+def get_client_load(i):
+    """(in-flight bytes, streams, flood_until) is worker + baaki workers ka."""
+    load = (inflight_bytes[i], work_loads[i], flood_until.get(i, 0))
+    if shared_load.enabled:
+        other_bytes, other_streams, other_flood = shared_load.others(i)
+        load = (load[0] + other_bytes, load[1] + other_streams, max(load[2], other_flood))
+    return load
+
+
+def get_least_loaded_client():
+    """Sabse kam in-flight bytes wala client; FloodWait wale rotation se bahar."""
+    now = time.monotonic()
+    loads = {i: get_client_load(i) for i in multi_clients}
+    ready = [i for i in loads if loads[i][2] <= now]
+    if not ready:
+        # sab FloodWait me hain: jiska wait sabse pehle khatam ho
+        ready = [min(loads, key=lambda i: loads[i][2])]
+    return min(ready, key=lambda i: loads[i][:2])
+
+
+def note_flood_wait(index, seconds):
+    flood_until[index] = time.monotonic() + seconds
+    metrics.FLOOD_WAITS.inc(index)
+    metrics.FLOOD_WAIT_SECONDS.inc(index, amount=seconds)
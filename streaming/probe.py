@@ -0,0 +1,456 @@
+# streaming/probe.py (MP4 / Matroska header + seek index parsing)
+#
+# `read(start, end)` se sirf zaroori byte ranges padhta hai (box/element
+# headers, moov, cues), poori file nahi. Result links doc me "media" banta hai.
+
+import sys
+import struct
+import asyncio
+from array import array
+
+KEYFRAME_SPACING = 1.0  # seconds; isse paas wale keyframes index me nahi
+
+
+class ProbeError(Exception):
+    pass
+
+
+class BoundedReader:
+    """`read` ke upar PROBE_MAX_BYTES ki limit."""
+
+    def __init__(self, read, size, limit):
+        self._read = read
+        self.size = size
+        self.limit = limit
+        self.used = 0
+
+    async def __call__(self, start, end):
+        end = min(end, self.size - 1)
+        if start > end:
+            return b""
+        self.used += end - start + 1
+        if self.used > self.limit:
+            raise ProbeError("probe byte budget exceeded")
+        return await self._read(start, end)
+
+
+async def probe(read, size, limit):
+    """Container pehchaan ke media info dict, ya None agar format pata nahi."""
+    reader = BoundedReader(read, size, limit)
+    head = await reader(0, 63)
+    if head[4:8] == b"ftyp":
+        return await probe_mp4(reader, size)
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        return await probe_matroska(reader, size)
+    return None
+
+
+def _thin(keyframes):
+    kept = []
+    for t, off in keyframes:
+        if not kept or t - kept[-1][0] >= KEYFRAME_SPACING:
+            kept.append([round(t, 3), off])
+    return kept
+
+
+# ==============================================
+# MP4 (ISO BMFF)
+# ==============================================
+def u32_array(buf, start, count):
+    arr = array("I", bytes(buf[start:start + 4 * count]))
+    if sys.byteorder == "little":
+        arr.byteswap()
+    return arr
+
+
+def mp4_boxes(buf, start, end):
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", buf, pos)
+        hlen = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", buf, pos + 8)[0]
+            hlen = 16
+        elif size == 0:
+            size = end - pos
+        if size < hlen or pos + size > end:
+            return
+        yield kind, pos + hlen, pos + size
+        pos += size
+
+
+def mp4_child(buf, start, end, *path):
+    for kind in path:
+        for k, s, e in mp4_boxes(buf, start, end):
+            if k == kind:
+                start, end = s, e
+                break
+        else:
+            return None
+    return start, end
+
+
+def timescale_duration(buf, start):
+    """mvhd / mdhd: (timescale, duration)."""
+    if buf[start] == 1:
+        return struct.unpack_from(">IQ", buf, start + 20)
+    return struct.unpack_from(">II", buf, start + 12)
+
+
+def _codec(buf, stsd):
+    start, _ = stsd
+    entry_size, fourcc = struct.unpack_from(">I4s", buf, start + 8)
+    entry = start + 8
+    codec = fourcc.decode("latin-1")
+    if fourcc in (b"avc1", b"avc3"):
+        # visual sample entry ke 78 bytes ke baad avcC
+        avcc = mp4_child(buf, entry + 86, entry + entry_size, b"avcC")
+        if avcc:
+            profile, compat, level = buf[avcc[0] + 1:avcc[0] + 4]
+            codec = f"{codec}.{profile:02x}{compat:02x}{level:02x}"
+    elif fourcc == b"mp4a":
+        codec = "mp4a.40.2"
+    return codec
+
+
+def _keyframes_mp4(buf, stbl, timescale):
+    s, e = stbl
+    stss = mp4_child(buf, s, e, b"stss")
+    stsz = mp4_child(buf, s, e, b"stsz")
+    stsc = mp4_child(buf, s, e, b"stsc")
+    stts = mp4_child(buf, s, e, b"stts")
+    stco = mp4_child(buf, s, e, b"stco")
+    co64 = mp4_child(buf, s, e, b"co64")
+    if not (stss and stsz and stsc and stts and (stco or co64)):
+        return []
+
+    sync = u32_array(buf, stss[0] + 8, struct.unpack_from(">I", buf, stss[0] + 4)[0])
+    fixed, count = struct.unpack_from(">II", buf, stsz[0] + 4)
+    sizes = None if fixed else u32_array(buf, stsz[0] + 12, count)
+    if stco:
+        offsets = u32_array(buf, stco[0] + 8, struct.unpack_from(">I", buf, stco[0] + 4)[0])
+    else:
+        n = struct.unpack_from(">I", buf, co64[0] + 4)[0]
+        offsets = struct.unpack_from(f">{n}Q", buf, co64[0] + 8)
+    n = struct.unpack_from(">I", buf, stsc[0] + 4)[0]
+    runs = struct.unpack_from(f">{3 * n}I", buf, stsc[0] + 8)
+    n = struct.unpack_from(">I", buf, stts[0] + 4)[0]
+    deltas = struct.unpack_from(f">{2 * n}I", buf, stts[0] + 8)
+
+    # sample number (1-based) -> byte offset, sirf sync samples ke liye
+    wanted = set(sync)
+    sample_offsets = {}
+    sample = 1
+    for i in range(len(runs) // 3):
+        first_chunk, per_chunk = runs[3 * i], runs[3 * i + 1]
+        last_chunk = runs[3 * (i + 1)] - 1 if 3 * (i + 1) < len(runs) else len(offsets)
+        for chunk in range(first_chunk, last_chunk + 1):
+            if chunk > len(offsets):
+                break
+            off = offsets[chunk - 1]
+            for _ in range(per_chunk):
+                if sample in wanted:
+                    sample_offsets[sample] = off
+                off += fixed or (sizes[sample - 1] if sample <= len(sizes) else 0)
+                sample += 1
+
+    # sample number -> decode time
+    keyframes = []
+    targets = iter(sorted(wanted))
+    target = next(targets, None)
+    sample, t = 1, 0
+    for i in range(0, len(deltas), 2):
+        run, delta = deltas[i], deltas[i + 1]
+        while target is not None and target < sample + run:
+            if target in sample_offsets:
+                time = (t + (target - sample) * delta) / timescale
+                keyframes.append((time, sample_offsets[target]))
+            target = next(targets, None)
+        sample += run
+        t += run * delta
+    return keyframes
+
+
+def parse_moov(buf):
+    mvhd = mp4_child(buf, 0, len(buf), b"mvhd")
+    timescale, duration = timescale_duration(buf, mvhd[0]) if mvhd else (1, 0)
+    info = {"duration": duration / timescale if timescale else 0, "codecs": []}
+    keyframes, has_video = [], False
+    for kind, s, e in mp4_boxes(buf, 0, len(buf)):
+        if kind != b"trak":
+            continue
+        hdlr = mp4_child(buf, s, e, b"mdia", b"hdlr")
+        mdhd = mp4_child(buf, s, e, b"mdia", b"mdhd")
+        stbl = mp4_child(buf, s, e, b"mdia", b"minf", b"stbl")
+        if not (hdlr and mdhd and stbl):
+            continue
+        handler = buf[hdlr[0] + 8:hdlr[0] + 12]
+        if handler not in (b"vide", b"soun"):
+            continue
+        stsd = mp4_child(buf, stbl[0], stbl[1], b"stsd")
+        if stsd:
+            info["codecs"].append(_codec(buf, stsd))
+        if handler == b"vide" and not has_video:
+            has_video = True
+            keyframes = _keyframes_mp4(buf, stbl, timescale_duration(buf, mdhd[0])[0])
+    info["has_video"] = has_video
+    info["keyframes"] = _thin(keyframes)
+    return info
+
+
+async def probe_mp4(read, size):
+    pos, moov, first_mdat = 0, None, None
+    while pos + 8 <= size:
+        hdr = await read(pos, pos + 15)
+        box_size, kind = struct.unpack_from(">I4s", hdr)
+        if box_size == 1:
+            box_size = struct.unpack_from(">Q", hdr, 8)[0]
+        elif box_size == 0:
+            box_size = size - pos
+        if box_size < 8:
+            break
+        if kind == b"moov":
+            moov = (pos, pos + box_size - 1)
+            break
+        if kind == b"mdat" and first_mdat is None:
+            first_mdat = pos
+        pos += box_size
+    if moov is None:
+        # fragmented MP4 (moof) ya toota hua file: index nahi
+        return None
+
+    buf = await read(*moov)
+    # moov payload ko top level ki tarah parse karo
+    hlen = 16 if struct.unpack_from(">I", buf)[0] == 1 else 8
+    info = await asyncio.to_thread(parse_moov, memoryview(buf)[hlen:])
+    # moov pehle ho to header = ftyp..moov, warna ftyp..mdat box header
+    header_end = moov[1] if first_mdat is None else min(first_mdat + 15, size - 1)
+    return {
+        "container": "mp4",
+        "mime_type": "video/mp4" if info["has_video"] else "audio/mp4",
+        "duration": round(info["duration"], 3),
+        "codecs": info["codecs"],
+        "header": [0, header_end],
+        "index": list(moov),
+        "keyframes": info["keyframes"],
+    }
+
+
+# ==============================================
+# MATROSKA / WEBM (EBML)
+# ==============================================
+EBML = 0x1A45DFA3
+DOC_TYPE = 0x4282
+SEGMENT = 0x18538067
+SEEK_HEAD = 0x114D9B74
+SEEK = 0x4DBB
+SEEK_ID = 0x53AB
+SEEK_POSITION = 0x53AC
+INFO = 0x1549A966
+TIMECODE_SCALE = 0x2AD7B1
+DURATION = 0x4489
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+TRACK_NUMBER = 0xD7
+TRACK_TYPE = 0x83
+CODEC_ID = 0x86
+CLUSTER = 0x1F43B675
+CUES = 0x1C53BB6B
+CUE_POINT = 0xBB
+CUE_TIME = 0xB3
+CUE_TRACK_POSITIONS = 0xB7
+CUE_TRACK = 0xF7
+CUE_CLUSTER_POSITION = 0xF1
+
+UNKNOWN_SIZE = -1
+MKV_HEAD_BYTES = 64 * 1024
+
+# Matroska CodecID -> RFC 6381 style codec names (HLS CODECS ke liye)
+MKV_CODECS = {
+    "V_MPEG4/ISO/AVC": "avc1",
+    "V_MPEGH/ISO/HEVC": "hvc1",
+    "V_VP8": "vp8",
+    "V_VP9": "vp09",
+    "V_AV1": "av01",
+    "A_AAC": "mp4a.40.2",
+    "A_OPUS": "opus",
+    "A_VORBIS": "vorbis",
+    "A_AC3": "ac-3",
+    "A_EAC3": "ec-3",
+    "A_MPEG/L3": "mp4a.40.34",
+    "A_FLAC": "flac",
+}
+
+
+def read_vint(buf, pos, keep_marker=False):
+    first = buf[pos]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8:
+        raise ProbeError("bad EBML vint")
+    value = first if keep_marker else first & (0xFF >> length)
+    all_ones = value == (0xFF >> length)
+    for b in buf[pos + 1:pos + length]:
+        value = (value << 8) | b
+        all_ones = all_ones and b == 0xFF
+    if all_ones and not keep_marker:
+        value = UNKNOWN_SIZE
+    return value, pos + length
+
+
+def ebml_element(buf, pos):
+    """(id, data start, data size) ; size UNKNOWN_SIZE ho sakta hai."""
+    eid, pos = read_vint(buf, pos, keep_marker=True)
+    size, pos = read_vint(buf, pos)
+    return eid, pos, size
+
+
+def ebml_elements(buf, start, end):
+    """(id, element start, data start, data end, poora buf me hai?)"""
+    pos = start
+    while pos < end:
+        try:
+            eid, data, size = ebml_element(buf, pos)
+        except (IndexError, ProbeError):
+            return
+        stop = end if size == UNKNOWN_SIZE else data + size
+        yield eid, pos, data, min(stop, end), stop <= end
+        if size == UNKNOWN_SIZE:
+            return
+        pos = stop
+
+
+def ebml_uint(buf, start, end):
+    return int.from_bytes(buf[start:end], "big")
+
+
+def ebml_float(buf, start, end):
+    if end - start == 4:
+        return struct.unpack_from(">f", buf, start)[0]
+    return struct.unpack_from(">d", buf, start)[0]
+
+
+async def read_element(read, offset, size):
+    """File offset pe pura element (header + data)."""
+    head = await read(offset, offset + 11)
+    eid, data, length = ebml_element(head, 0)
+    if length == UNKNOWN_SIZE:
+        raise ProbeError("unknown-size element")
+    return eid, await read(offset, offset + data + length - 1), data
+
+
+async def probe_matroska(read, size):
+    head = await read(0, MKV_HEAD_BYTES - 1)
+    eid, data, length = ebml_element(head, 0)
+    doc_type = "matroska"
+    for child, _, s, e, _ in ebml_elements(head, data, data + length):
+        if child == DOC_TYPE:
+            doc_type = bytes(head[s:e]).decode("ascii", "replace").strip("\0")
+    seg_id, seg_start, _ = ebml_element(head, data + length)
+    if seg_id != SEGMENT:
+        return None
+
+    info = {"timecode_scale": 1000000, "duration": 0.0, "tracks": {}}
+    seek = {}
+    first_cluster = None
+    for child, pos, s, e, complete in ebml_elements(head, seg_start, len(head)):
+        if child == CLUSTER:
+            first_cluster = pos
+            break
+        if not complete:
+            continue
+        if child == SEEK_HEAD:
+            for sk, _, ss, se, _ in ebml_elements(head, s, e):
+                if sk != SEEK:
+                    continue
+                target = position = None
+                for f, _, fs, fe, _ in ebml_elements(head, ss, se):
+                    if f == SEEK_ID:
+                        target = ebml_uint(head, fs, fe)
+                    elif f == SEEK_POSITION:
+                        position = ebml_uint(head, fs, fe)
+                if target is not None and position is not None:
+                    seek.setdefault(target, seg_start + position)
+        elif child == INFO:
+            _parse_info(head, s, e, info)
+        elif child == TRACKS:
+            _parse_tracks(head, s, e, info)
+
+    # Info/Tracks head ke baahar hon to SeekHead se padho
+    for element, parser in ((INFO, _parse_info), (TRACKS, _parse_tracks)):
+        if element in seek and seek[element] >= len(head):
+            _, buf, data = await read_element(read, seek[element], size)
+            parser(buf, data, len(buf), info)
+
+    video = next((n for n, t in info["tracks"].items() if t["type"] == 1), None)
+    keyframes, cues = [], None
+    if CUES in seek:
+        eid, buf, data = await read_element(read, seek[CUES], size)
+        if eid == CUES:
+            cues = [seek[CUES], seek[CUES] + len(buf) - 1]
+            keyframes = await asyncio.to_thread(_parse_cues, buf, data, seg_start, info, video)
+
+    scale = info["timecode_scale"] / 1e9
+    if first_cluster is None:
+        first_cluster = seek.get(CLUSTER, len(head))
+    kind = "webm" if doc_type == "webm" else "x-matroska"
+    return {
+        "container": doc_type,
+        "mime_type": f"{'video' if video else 'audio'}/{kind}",
+        "duration": round(info["duration"] * scale, 3),
+        "codecs": [t["codec"] for t in info["tracks"].values() if t["type"] in (1, 2)],
+        "header": [0, first_cluster - 1],
+        "index": cues,
+        "keyframes": _thin(keyframes),
+    }
+
+
+def _parse_info(buf, start, end, info):
+    for eid, _, s, e, _ in ebml_elements(buf, start, end):
+        if eid == TIMECODE_SCALE:
+            info["timecode_scale"] = ebml_uint(buf, s, e)
+        elif eid == DURATION:
+            info["duration"] = ebml_float(buf, s, e)
+
+
+def _parse_tracks(buf, start, end, info):
+    for eid, _, s, e, _ in ebml_elements(buf, start, end):
+        if eid == TRACK_ENTRY:
+            track = {"type": 0, "codec": ""}
+            number = None
+            for f, _, fs, fe, _ in ebml_elements(buf, s, e):
+                if f == TRACK_NUMBER:
+                    number = ebml_uint(buf, fs, fe)
+                elif f == TRACK_TYPE:
+                    track["type"] = ebml_uint(buf, fs, fe)
+                elif f == CODEC_ID:
+                    codec = bytes(buf[fs:fe]).decode("ascii", "replace").strip("\0")
+                    track["codec"] = MKV_CODECS.get(codec, codec)
+            if number is not None:
+                info["tracks"][number] = track
+
+
+def _parse_cues(buf, start, seg_start, info, video):
+    """CuePoints -> [(seconds, cluster file offset)] video track ke."""
+    scale = info["timecode_scale"] / 1e9
+    keyframes = []
+    for eid, _, s, e, _ in ebml_elements(buf, start, len(buf)):
+        if eid != CUE_POINT:
+            continue
+        time = None
+        for f, _, fs, fe, _ in ebml_elements(buf, s, e):
+            if f == CUE_TIME:
+                time = ebml_uint(buf, fs, fe) * scale
+            elif f == CUE_TRACK_POSITIONS and time is not None:
+                track = pos = None
+                for g, _, gs, ge, _ in ebml_elements(buf, fs, fe):
+                    if g == CUE_TRACK:
+                        track = ebml_uint(buf, gs, ge)
+                    elif g == CUE_CLUSTER_POSITION:
+                        pos = ebml_uint(buf, gs, ge)
+                if pos is not None and (video is None or track == video):
+                    keyframes.append((time, seg_start + pos))
+                    break
+    keyframes.sort()
+    return keyframes
@@ -0,0 +1,53 @@
+# streaming/rate_limit.py (token buckets in front of Telegram calls)
+
+import time
+import asyncio
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        # token pehle hi le lo (negative ho sakta hai), phir kami jitna so jao:
+        # waiters apne aane ke order me chhoot-te hain
+        self._refill()
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+    def pause(self, seconds):
+        """FloodWait: agle `seconds` tak koi token nahi."""
+        self._refill()
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class RateLimiter:
+    """(client index, DC ya "api") ke hisaab se alag buckets."""
+
+    def __init__(self):
+        self._buckets = {}
+
+    async def wait(self, key, rate, burst):
+        if rate <= 0:
+            return
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, burst)
+        await bucket.acquire()
+
+    def pause(self, key, seconds):
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket.pause(seconds)
+
+
+limiter = RateLimiter()
@@ -0,0 +1,429 @@
+# streaming/remux.py (MP4 / MKV samples -> fMP4 fragments, bina re-encode)
+#
+# Har source do kaam karta hai: init_segment() aur segment(read, ...), jahan
+# `read(start, end)` ByteStreamer se sirf zaroori byte ranges laata hai.
+
+import struct
+from array import array
+from bisect import bisect_left
+
+from . import fmp4
+from .probe import (
+    u32_array,
+    mp4_boxes,
+    mp4_child,
+    timescale_duration,
+    read_vint,
+    ebml_element,
+    ebml_elements,
+    ebml_uint,
+    ebml_float,
+    SEGMENT,
+    INFO,
+    TIMECODE_SCALE,
+    TRACKS,
+    TRACK_ENTRY,
+    TRACK_NUMBER,
+    TRACK_TYPE,
+    CODEC_ID,
+    CLUSTER,
+    UNKNOWN_SIZE,
+)
+
+MERGE_GAP = 1024 * 1024  # itne paas ke sample ranges ek hi read me
+MP4_CODECS = (b"avc1", b"avc3", b"hvc1", b"hev1", b"mp4a")
+
+
+def read_spans(spans):
+    """(start, end) ranges ko sort + merge; [(start, end)] inclusive."""
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1] + 1 + MERGE_GAP:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+async def fetch_spans(read, spans):
+    """spans ko padh ke offset -> bytes lookup function deta hai."""
+    merged = read_spans(spans)
+    blobs = [(start, await read(start, end)) for start, end in merged]
+    starts = [start for start, _ in blobs]
+
+    def view(start, end):
+        base, data = blobs[bisect_left(starts, start + 1) - 1]
+        return memoryview(data)[start - base:end - base + 1]
+
+    return view
+
+
+# ==============================================
+# MP4 (sample tables from moov)
+# ==============================================
+def _mp4_track(buf, s, e):
+    hdlr = mp4_child(buf, s, e, b"mdia", b"hdlr")
+    mdhd = mp4_child(buf, s, e, b"mdia", b"mdhd")
+    stbl = mp4_child(buf, s, e, b"mdia", b"minf", b"stbl")
+    if not (hdlr and mdhd and stbl):
+        return None
+    kind = bytes(buf[hdlr[0] + 8:hdlr[0] + 12])
+    stsd = mp4_child(buf, *stbl, b"stsd")
+    if kind not in (b"vide", b"soun") or not stsd:
+        return None
+    entry_size, fourcc = struct.unpack_from(">I4s", buf, stsd[0] + 8)
+    if fourcc not in MP4_CODECS:
+        return None
+    entry = bytes(buf[stsd[0] + 8:stsd[0] + 8 + entry_size])
+    timescale, duration = timescale_duration(buf, mdhd[0])
+    track = {
+        "id": 1 if kind == b"vide" else 2,
+        "kind": kind,
+        "timescale": timescale,
+        "duration": duration,
+        "entry": entry,
+    }
+    if kind == b"vide":
+        track["width"], track["height"] = struct.unpack_from(">HH", entry, 32)
+
+    tables = {k: mp4_child(buf, *stbl, k) for k in (b"stts", b"ctts", b"stss", b"stsz", b"stsc", b"stco", b"co64")}
+    if not (tables[b"stts"] and tables[b"stsz"] and tables[b"stsc"] and (tables[b"stco"] or tables[b"co64"])):
+        return None
+
+    fixed, count = struct.unpack_from(">II", buf, tables[b"stsz"][0] + 4)
+    sizes = array("I", [fixed]) * count if fixed else u32_array(buf, tables[b"stsz"][0] + 12, count)
+
+    dts = array("q")
+    n = struct.unpack_from(">I", buf, tables[b"stts"][0] + 4)[0]
+    runs = u32_array(buf, tables[b"stts"][0] + 8, 2 * n)
+    t = 0
+    for i in range(0, len(runs), 2):
+        for _ in range(runs[i]):
+            dts.append(t)
+            t += runs[i + 1]
+    track["end_dts"] = t
+
+    cts = None
+    if tables[b"ctts"]:
+        version = buf[tables[b"ctts"][0]]
+        n = struct.unpack_from(">I", buf, tables[b"ctts"][0] + 4)[0]
+        runs = struct.unpack_from(f">{2 * n}{'i' if version else 'I'}", buf, tables[b"ctts"][0] + 8)
+        cts = array("i")
+        for i in range(0, len(runs), 2):
+            cts.extend([runs[i + 1]] * runs[i])
+
+    if tables[b"stco"]:
+        n = struct.unpack_from(">I", buf, tables[b"stco"][0] + 4)[0]
+        chunks = u32_array(buf, tables[b"stco"][0] + 8, n)
+    else:
+        n = struct.unpack_from(">I", buf, tables[b"co64"][0] + 4)[0]
+        chunks = struct.unpack_from(f">{n}Q", buf, tables[b"co64"][0] + 8)
+    n = struct.unpack_from(">I", buf, tables[b"stsc"][0] + 4)[0]
+    stsc = u32_array(buf, tables[b"stsc"][0] + 8, 3 * n)
+    offsets = array("q")
+    sample = 0
+    for i in range(0, len(stsc), 3):
+        first, per_chunk = stsc[i], stsc[i + 1]
+        last = stsc[i + 3] - 1 if i + 3 < len(stsc) else len(chunks)
+        for chunk in range(first, min(last, len(chunks)) + 1):
+            off = chunks[chunk - 1]
+            for _ in range(per_chunk):
+                if sample >= count:
+                    break
+                offsets.append(off)
+                off += sizes[sample]
+                sample += 1
+
+    sync = None
+    if tables[b"stss"]:
+        n = struct.unpack_from(">I", buf, tables[b"stss"][0] + 4)[0]
+        sync = set(u32_array(buf, tables[b"stss"][0] + 8, n))
+
+    n = min(len(dts), len(sizes), len(offsets))
+    track.update(dts=dts[:n], sizes=sizes[:n], offsets=offsets[:n], cts=cts, sync=sync)
+    return track
+
+
+class Mp4Source:
+    def __init__(self, tracks):
+        self.tracks = tracks
+
+    @classmethod
+    def parse(cls, moov):
+        """moov box (header samet) -> pehla video + pehla audio track."""
+        hlen = 16 if struct.unpack_from(">I", moov)[0] == 1 else 8
+        buf = memoryview(moov)[hlen:]
+        tracks = {}
+        for kind, s, e in mp4_boxes(buf, 0, len(buf)):
+            if kind != b"trak":
+                continue
+            track = _mp4_track(buf, s, e)
+            if track and track["kind"] not in tracks:
+                tracks[track["kind"]] = track
+        if b"vide" not in tracks:
+            return None
+        return cls([tracks[k] for k in (b"vide", b"soun") if k in tracks])
+
+    def init_segment(self):
+        return fmp4.init_segment(self.tracks)
+
+    async def segment(self, read, seq, t0, t1):
+        """[t0, t1) seconds ke samples; t0 None = shuru se, t1 None = ant tak."""
+        picks = []
+        for track in self.tracks:
+            # keyframe times index me 3 decimals tak rounded hain
+            ts, dts = track["timescale"], track["dts"]
+            a = 0 if t0 is None else bisect_left(dts, (t0 - 0.0005) * ts)
+            b = len(dts) if t1 is None else bisect_left(dts, (t1 - 0.0005) * ts)
+            picks.append((track, a, b))
+
+        spans = [
+            (track["offsets"][k], track["offsets"][k] + track["sizes"][k] - 1)
+            for track, a, b in picks
+            for k in range(a, b)
+            if track["sizes"][k]
+        ]
+        view = await fetch_spans(read, spans)
+
+        fragments = []
+        for track, a, b in picks:
+            dts, sizes, offsets, cts, sync = (
+                track[k] for k in ("dts", "sizes", "offsets", "cts", "sync")
+            )
+            samples, data = [], []
+            for k in range(a, b):
+                end = dts[k + 1] if k + 1 < len(dts) else track["end_dts"]
+                flags = fmp4.SYNC_FLAGS if sync is None or k + 1 in sync else fmp4.NON_SYNC_FLAGS
+                offset = cts[k] if cts and k < len(cts) else 0
+                samples.append((end - dts[k], sizes[k], flags, offset))
+                if sizes[k]:
+                    data.append(view(offsets[k], offsets[k] + sizes[k] - 1))
+            if samples:
+                fragments.append((track["id"], dts[a], samples, b"".join(data)))
+        return fmp4.media_segment(seq, fragments)
+
+
+# ==============================================
+# MATROSKA (clusters -> samples)
+# ==============================================
+CODEC_PRIVATE = 0x63A2
+DEFAULT_DURATION = 0x23E383
+VIDEO = 0xE0
+PIXEL_WIDTH = 0xB0
+PIXEL_HEIGHT = 0xBA
+AUDIO = 0xE1
+SAMPLING_FREQUENCY = 0xB5
+CHANNELS = 0x9F
+TIMESTAMP = 0xE7
+SIMPLE_BLOCK = 0xA3
+BLOCK_GROUP = 0xA0
+BLOCK = 0xA1
+REFERENCE_BLOCK = 0xFB
+
+TIMESCALE = 1000  # fMP4 tracks milliseconds me
+
+
+def _mkv_track(buf, s, e):
+    t = {"number": None, "type": 0, "codec": "", "private": b"", "default_duration": 0,
+         "width": 0, "height": 0, "rate": 48000.0, "channels": 2}
+    for eid, _, fs, fe, _ in ebml_elements(buf, s, e):
+        if eid == TRACK_NUMBER:
+            t["number"] = ebml_uint(buf, fs, fe)
+        elif eid == TRACK_TYPE:
+            t["type"] = ebml_uint(buf, fs, fe)
+        elif eid == CODEC_ID:
+            t["codec"] = bytes(buf[fs:fe]).decode("ascii", "replace").strip("\0")
+        elif eid == CODEC_PRIVATE:
+            t["private"] = bytes(buf[fs:fe])
+        elif eid == DEFAULT_DURATION:
+            t["default_duration"] = ebml_uint(buf, fs, fe)
+        elif eid == VIDEO:
+            for v, _, vs, ve, _ in ebml_elements(buf, fs, fe):
+                if v == PIXEL_WIDTH:
+                    t["width"] = ebml_uint(buf, vs, ve)
+                elif v == PIXEL_HEIGHT:
+                    t["height"] = ebml_uint(buf, vs, ve)
+        elif eid == AUDIO:
+            for a, _, as_, ae, _ in ebml_elements(buf, fs, fe):
+                if a == SAMPLING_FREQUENCY:
+                    t["rate"] = ebml_float(buf, as_, ae)
+                elif a == CHANNELS:
+                    t["channels"] = ebml_uint(buf, as_, ae)
+    return t
+
+
+def _sample_entry(t):
+    if t["type"] == 1 and t["private"]:
+        if t["codec"] == "V_MPEG4/ISO/AVC":
+            return b"vide", fmp4.visual_entry(b"avc1", t["width"], t["height"], fmp4.box(b"avcC", t["private"]))
+        if t["codec"] == "V_MPEGH/ISO/HEVC":
+            return b"vide", fmp4.visual_entry(b"hvc1", t["width"], t["height"], fmp4.box(b"hvcC", t["private"]))
+    if t["type"] == 2 and t["codec"].startswith("A_AAC"):
+        config = t["private"] or fmp4.aac_config(t["rate"], t["channels"])
+        return b"soun", fmp4.mp4a_entry(t["rate"], t["channels"], config)
+    return None, None
+
+
+def _laced_frames(buf, pos, end, lacing):
+    """Block data -> [(start, end)] frames (no / Xiph / fixed / EBML lacing)."""
+    if not lacing:
+        return [(pos, end)]
+    count = buf[pos] + 1
+    pos += 1
+    sizes = []
+    if lacing == 0x02:  # Xiph
+        for _ in range(count - 1):
+            size = 0
+            while True:
+                size += buf[pos]
+                pos += 1
+                if buf[pos - 1] != 255:
+                    break
+            sizes.append(size)
+    elif lacing == 0x06:  # EBML
+        size, pos = read_vint(buf, pos)
+        sizes.append(size)
+        for _ in range(count - 2):
+            start = pos
+            diff, pos = read_vint(buf, pos)
+            size += diff - ((1 << (7 * (pos - start) - 1)) - 1)
+            sizes.append(size)
+    else:  # fixed
+        sizes = [(end - pos) // count] * (count - 1)
+    sizes.append(end - pos - sum(sizes))
+    frames = []
+    for size in sizes:
+        frames.append((pos, pos + size))
+        pos += size
+    return frames
+
+
+class MkvSource:
+    def __init__(self, tracks, timecode_scale):
+        self.tracks = tracks  # track number -> fMP4 track dict
+        self.scale = timecode_scale / 1e6  # timecode units -> ms
+        self.video = next(n for n, t in tracks.items() if t["kind"] == b"vide")
+
+    @classmethod
+    def parse(cls, head):
+        """Header region (EBML header .. pehla Cluster) se tracks."""
+        eid, data, length = ebml_element(head, 0)
+        seg_id, seg_start, _ = ebml_element(head, data + length)
+        if seg_id != SEGMENT:
+            return None
+        scale, entries = 1000000, []
+        for eid, _, s, e, complete in ebml_elements(head, seg_start, len(head)):
+            if eid == CLUSTER:
+                break
+            if eid == TRACKS and complete:
+                entries = [
+                    _mkv_track(head, ts, te)
+                    for tid, _, ts, te, _ in ebml_elements(head, s, e)
+                    if tid == TRACK_ENTRY
+                ]
+            elif eid == INFO and complete:
+                for f, _, fs, fe, _ in ebml_elements(head, s, e):
+                    if f == TIMECODE_SCALE:
+                        scale = ebml_uint(head, fs, fe)
+        tracks = {}
+        for t in entries:
+            kind, entry = _sample_entry(t)
+            if kind and kind not in [x["kind"] for x in tracks.values()]:
+                tracks[t["number"]] = {
+                    "id": 1 if kind == b"vide" else 2,
+                    "kind": kind,
+                    "timescale": TIMESCALE,
+                    "entry": entry,
+                    "width": t["width"],
+                    "height": t["height"],
+                    "default_duration": round(t["default_duration"] / 1e6),
+                }
+        if not any(t["kind"] == b"vide" for t in tracks.values()):
+            return None
+        return cls(tracks, scale)
+
+    def init_segment(self):
+        return fmp4.init_segment(sorted(self.tracks.values(), key=lambda t: t["id"]))
+
+    def blocks(self, buf):
+        """Clusters ke blocks storage order me: (track, pts ms, keyframe, frame views)."""
+        for eid, _, s, e, complete in ebml_elements(buf, 0, len(buf)):
+            if eid != CLUSTER:
+                continue
+            cluster_ts = 0
+            for child, _, cs, ce, ok in ebml_elements(buf, s, e):
+                if not ok:
+                    break
+                if child == TIMESTAMP:
+                    cluster_ts = ebml_uint(buf, cs, ce)
+                elif child == SIMPLE_BLOCK:
+                    yield self._block(buf, cs, ce, cluster_ts, None)
+                elif child == BLOCK_GROUP:
+                    block, key = None, True
+                    for g, _, gs, ge, _ in ebml_elements(buf, cs, ce):
+                        if g == BLOCK:
+                            block = (gs, ge)
+                        elif g == REFERENCE_BLOCK:
+                            key = False
+                    if block:
+                        yield self._block(buf, *block, cluster_ts, key)
+
+    def _block(self, buf, start, end, cluster_ts, key):
+        number, pos = read_vint(buf, start)
+        rel, flags = struct.unpack_from(">hB", buf, pos)
+        if key is None:
+            key = bool(flags & 0x80)
+        frames = _laced_frames(buf, pos + 3, end, flags & 0x06)
+        return number, round((cluster_ts + rel) * self.scale), key, [buf[a:b] for a, b in frames]
+
+    async def segment(self, read, seq, start, end, lookahead_end, first=False):
+        """Clusters [start, end] + agle segment ka pehla keyframe tak (lookahead).
+
+        Segment pehle video keyframe se shuru hota hai (`first` ho to shuru
+        se); uske pehle ke blocks pichhle segment ke lookahead me jaate hain.
+        """
+        buf = memoryview(await read(start, end))
+        after = memoryview(await read(end + 1, lookahead_end)) if lookahead_end > end else None
+        picked = {n: [] for n in self.tracks}
+        started = first
+        for number, pts, key, frames in self.blocks(buf):
+            if number == self.video and key:
+                started = True
+            if started and number in picked:
+                picked[number].append((pts, key, frames))
+        if after is not None:
+            for number, pts, key, frames in self.blocks(after):
+                if number == self.video and key:
+                    break
+                if number in picked:
+                    picked[number].append((pts, key, frames))
+        return fmp4.media_segment(seq, [self._fragment(n, b) for n, b in picked.items() if b])
+
+    def _fragment(self, number, blocks):
+        track = self.tracks[number]
+        step = track["default_duration"]
+        samples = []  # (pts, key, frame)
+        for pts, key, frames in blocks:
+            for i, frame in enumerate(frames):
+                samples.append((pts + i * step, key, frame))
+        pts = [s[0] for s in samples]
+        # storage order = decode order; DTS = sorted PTS (B-frames ke liye)
+        dts = sorted(pts) if track["kind"] == b"vide" else pts
+        entries = []
+        for i, (p, key, frame) in enumerate(samples):
+            if i + 1 < len(dts):
+                duration = dts[i + 1] - dts[i]
+            else:
+                duration = step or (entries[-1][0] if entries else 0)
+            flags = fmp4.SYNC_FLAGS if key else fmp4.NON_SYNC_FLAGS
+            entries.append((max(0, duration), len(frame), flags, p - dts[i]))
+        return track["id"], dts[0], entries, b"".join(s[2] for s in samples)
+
+
+async def cluster_end(read, offset, max_bytes):
+    """`offset` pe shuru hone wale Cluster ka last byte (lookahead ke liye)."""
+    head = await read(offset, offset + 11)
+    eid, data, length = ebml_element(head, 0)
+    if eid != CLUSTER or length == UNKNOWN_SIZE or data + length > max_bytes:
+        return offset - 1
+    return offset + data + length - 1
@@ -0,0 +1,220 @@
+# streaming/response.py (response writer for /dl)
+
+import time
+import secrets
+import traceback
+
+from pyrogram.errors import FloodWait, BadRequest
+from fastapi import Request, HTTPException
+from fastapi.responses import StreamingResponse, JSONResponse, Response
+
+from config import Config
+import metrics
+from .streamer import acquire_streamer
+from .media_index import get_index, cached_index, pinned_range
+from .tokens import verify_link
+from .fair import scheduler
+from .ranges import RangeNotSatisfiable, parse_range, multipart_length
+from .http_cache import (
+    make_etag,
+    http_date,
+    is_not_modified,
+    if_range_matches,
+    cache_control_for,
+)
+
+
+class ByteStreamResponse(StreamingResponse):
+    """Sends memoryview parts as-is and feeds each send's blocking time back to the body."""
+
+    def __init__(self, content, started=None, viewer=None, **kwargs):
+        super().__init__(content, **kwargs)
+        self.started = started  # request start, TTFB ke liye
+        self.viewer = viewer  # admission slot, body khatam hone pe chhoot-ta hai
+
+    async def stream_response(self, send):
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            await self._send_body(send)
+        finally:
+            if self.viewer is not None:
+                scheduler.leave(self.viewer)
+                self.viewer = None
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _send_body(self, send):
+        body = self.body_iterator
+        sent = None
+        try:
+            while True:
+                try:
+                    chunk = await body.asend(sent)
+                except StopAsyncIteration:
+                    break
+                started = time.monotonic()
+                # server ka send transport buffer bhara ho to yahin rukta hai
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                sent = time.monotonic() - started
+                if self.started is not None:
+                    metrics.TTFB.observe(time.monotonic() - self.started)
+                    self.started = None
+                metrics.BYTES_SERVED.inc(amount=len(chunk))
+        finally:
+            await body.aclose()
+
+
+async def yield_view(view):
+    yield view
+
+
+def viewer_key(r: Request, key):
+    """Viewer = client IP + link; proxy ke peeche IP header ki aakhri entry se."""
+    ip = r.client.host if r.client else ""
+    if Config.REAL_IP_HEADER:
+        forwarded = r.headers.get(Config.REAL_IP_HEADER)
+        if forwarded:
+            ip = forwarded.rsplit(",", 1)[-1].strip()
+    return f"{ip}|{key}"
+
+
+async def resolve_file(mid):
+    """Least-loaded streamer + message ki file properties (FloodWait pe doosra client)."""
+    for attempt in range(2):
+        st = await acquire_streamer()
+        try:
+            return st, await st.get_file_properties(mid)
+        except FloodWait:
+            # is client ko rotation se hata diya gaya, doosra try karo
+            if attempt:
+                raise
+
+
+async def serve_media(r: Request, key: str, fname: str):
+    """GET/HEAD /dl ka poora jawab: validators, ranges, streaming body.
+
+    `key` signed token ho to headers/304/416/HEAD sab token se hi, bina
+    Mongo ya get_messages; purana numeric message id bhi chalta hai.
+    """
+    started = time.monotonic()
+
+    try:
+        st = props = media = None
+        if key.isdigit():
+            if not Config.ALLOW_RAW_DL:
+                raise HTTPException(404)
+            # HEAD bhi yahin se jawab deta hai: cached metadata, koi GetFile nahi
+            st, props = await resolve_file(int(key))
+            file = props
+            content_type = props["mime_type"]
+            media = await get_index(props["file_unique_id"])
+            if media:
+                # ingest pe container se pata chala asli mime
+                content_type = media["mime_type"]
+        else:
+            file = verify_link(key)
+            if file is None:
+                raise HTTPException(404, detail="Link expired or invalid.")
+            content_type = file["mime_type"]
+        size = file["file_size"]
+        date = file.get("date")
+
+        # ===== HEADERS =====
+        headers = {
+            "Content-Type": content_type,
+            "Accept-Ranges": "bytes",
+            "Content-Disposition": f'inline; filename="{fname}"',
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "GET, HEAD, POST, OPTIONS",
+            "Access-Control-Allow-Headers": "Range, Content-Type, X-Requested-With",
+            "Access-Control-Expose-Headers": "Content-Range, Content-Length, Accept-Ranges, ETag, Last-Modified",
+            "Cache-Control": cache_control_for(content_type),
+            "ETag": make_etag(file["file_unique_id"], size),
+        }
+        if date:
+            headers["Last-Modified"] = http_date(date)
+
+        # ===== Conditional requests =====
+        if is_not_modified(r.headers, headers["ETag"], date):
+            return Response(status_code=304, headers=headers)
+
+        # ===== Range headers =====
+        range_header = r.headers.get("Range", "")
+        if range_header and not if_range_matches(r.headers, headers["ETag"], date):
+            range_header = ""  # stale If-Range: poori file bhejo
+        try:
+            ranges = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            raise HTTPException(416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+        if ranges is None:
+            status, body_len = 200, size
+        elif len(ranges) == 1:
+            fb, ub = ranges[0]
+            status, body_len = 206, ub - fb + 1
+            headers["Content-Range"] = f"bytes {fb}-{ub}/{size}"
+        else:
+            # multipart/byteranges
+            boundary = secrets.token_hex(12)
+            status = 206
+            body_len = multipart_length(ranges, boundary, content_type, size)
+            headers["Content-Type"] = f"multipart/byteranges; boundary={boundary}"
+        headers["Content-Length"] = str(body_len)
+
+        if r.method == "HEAD" or size == 0:
+            return Response(status_code=status, headers=headers)
+
+        # overload / bahut saare connections: upstream kaam se pehle hi mana
+        weight = 1 if props is not None else Config.SIGNED_VIEWER_WEIGHT
+        viewer = scheduler.admit(viewer_key(r, key), weight)
+        try:
+            if props is None:
+                # body ke liye hi file_reference chahiye (streamer ka cache, warna get_messages)
+                st, props = await resolve_file(file["mid"])
+                if props["file_unique_id"] != file["file_unique_id"]:
+                    raise HTTPException(404)
+
+            if ranges is None:
+                body = st.yield_range(props, 0, size - 1, viewer)
+            elif len(ranges) == 1:
+                # moov / cues / header probes pinned buffer se, bina GetFile;
+                # signed link pe Mongo ka intezaar nahi, sirf cached index
+                if media is None:
+                    media = cached_index(props["file_unique_id"])
+                view = await pinned_range(st, props, media, *ranges[0])
+                body = (
+                    yield_view(view) if view is not None
+                    else st.yield_range(props, *ranges[0], viewer)
+                )
+            else:
+                body = st.yield_multipart(props, ranges, boundary, viewer)
+        except BaseException:
+            scheduler.leave(viewer)
+            raise
+        return ByteStreamResponse(body, started, viewer, status_code=status, headers=headers)
+    except HTTPException:
+        raise
+    except FloodWait as e:
+        raise HTTPException(503, headers={"Retry-After": str(e.value)})
+    except (FileNotFoundError, BadRequest):
+        raise HTTPException(404)
+    except Exception:
+        print(f"Error in /dl route: {traceback.format_exc()}")
+        raise HTTPException(500)
+
+
+def options_response():
+    """CORS preflight for /dl."""
+    return JSONResponse(
+        content={},
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "GET, HEAD, OPTIONS",
+            "Access-Control-Allow-Headers": "Range, Content-Type",
+        },
+    )
@@ -0,0 +1,130 @@
+# streaming/sessions.py (race-free media sessions per DC for one client)
+
+import asyncio
+import itertools
+
+from pyrogram import raw
+from pyrogram.session import Session, Auth
+
+
+class MediaSessionPool:
+    """Keeps up to `size` media sessions per DC for a Pyrogram client."""
+
+    def __init__(self, client, size=2, health_interval=60):
+        self.client = client
+        self.size = max(1, size)
+        self.health_interval = health_interval
+        self._sessions = {}  # dc_id -> [Session, ...]
+        self._locks = {}  # dc_id -> asyncio.Lock
+        self._rr = itertools.count()
+        self._tasks = set()
+        self._health_task = None
+
+    def _lock(self, dc_id):
+        return self._locks.setdefault(dc_id, asyncio.Lock())
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def count(self, dc_id=None):
+        if dc_id is not None:
+            return len(self._sessions.get(dc_id, []))
+        return sum(len(s) for s in self._sessions.values())
+
+    async def get(self, dc_id):
+        sessions = self._sessions.get(dc_id)
+        if not sessions:
+            # sirf pehla request session banata hai, baaki lock pe wait karte hain
+            async with self._lock(dc_id):
+                sessions = self._sessions.get(dc_id)
+                if not sessions:
+                    sessions = self._sessions[dc_id] = [await self._create(dc_id)]
+            if self.size > 1:
+                self._spawn(self._fill(dc_id))
+            self._ensure_health_check()
+        return sessions[next(self._rr) % len(sessions)]
+
+    async def prewarm(self, dc_ids):
+        """Startup pe in DCs ke sessions pehle se bana deta hai."""
+        await asyncio.gather(*(self._fill(dc_id) for dc_id in set(dc_ids)))
+        self._ensure_health_check()
+
+    async def replace(self, dc_id, ms):
+        """Dead session ko pool se hata ke doosra session deta hai."""
+        async with self._lock(dc_id):
+            sessions = self._sessions.get(dc_id, [])
+            if ms in sessions:
+                sessions.remove(ms)
+                self._spawn(self._stop(ms))
+            refill = 0 < len(sessions) < self.size
+        if refill:
+            # pool khaali ho to get() khud bharta hai; warna yahan se wapas size tak
+            self._spawn(self._fill(dc_id))
+        return await self.get(dc_id)
+
+    async def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+        if self._health_task:
+            self._health_task.cancel()
+        for sessions in self._sessions.values():
+            for ms in sessions:
+                await self._stop(ms)
+        self._sessions.clear()
+
+    async def _fill(self, dc_id):
+        async with self._lock(dc_id):
+            sessions = self._sessions.setdefault(dc_id, [])
+            while len(sessions) < self.size:
+                try:
+                    sessions.append(await self._create(dc_id))
+                except Exception as e:
+                    print(f"Media session error (DC {dc_id}): {e}")
+                    break
+
+    async def _create(self, dc_id):
+        client = self.client
+        test_mode = await client.storage.test_mode()
+        if dc_id != await client.storage.dc_id():
+            auth = await Auth(client, dc_id, test_mode).create()
+            ms = Session(client, dc_id, auth, test_mode, is_media=True)
+            await ms.start()
+            exp = await client.invoke(
+                raw.functions.auth.ExportAuthorization(dc_id=dc_id)
+            )
+            await ms.invoke(
+                raw.functions.auth.ImportAuthorization(id=exp.id, bytes=exp.bytes)
+            )
+        else:
+            ms = Session(
+                client, dc_id, await client.storage.auth_key(), test_mode, is_media=True
+            )
+            await ms.start()
+        return ms
+
+    @staticmethod
+    async def _stop(ms):
+        try:
+            await ms.stop()
+        except Exception:
+            pass
+
+    def _ensure_health_check(self):
+        if self._health_task is None and self.health_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            for dc_id, sessions in list(self._sessions.items()):
+                for ms in list(sessions):
+                    try:
+                        await ms.invoke(raw.functions.Ping(ping_id=0), retries=0, timeout=10)
+                    except Exception as e:
+                        print(f"Media session (DC {dc_id}) dead, reconnecting: {e}")
+                        try:
+                            await self.replace(dc_id, ms)
+                        except Exception as e:
+                            print(f"Media session reconnect failed (DC {dc_id}): {e}")
@@ -0,0 +1,130 @@
+# streaming/shared_load.py (load counters shared between uvicorn workers)
+
+import os
+import mmap
+import time
+import fcntl
+import struct
+import asyncio
+
+MAX_WORKERS = 64
+MAX_CLIENTS = 32
+HEADER = struct.Struct("qd")  # pid, heartbeat (time.monotonic, same clock for all processes)
+SLOT = struct.Struct("qqd")  # inflight bytes, active streams, flood_until
+ROW_SIZE = HEADER.size + SLOT.size * MAX_CLIENTS
+STALE_AFTER = 2.0  # itni der heartbeat na aaye to worker ko mara hua maano
+
+
+class SharedLoad:
+    """Har worker apni row likhta hai; scheduler baaki workers ki rows jodta hai."""
+
+    def __init__(self, path):
+        self.path = path
+        self.row = None
+        self._mm = None
+        self._fd = None
+        self._task = None
+
+    @property
+    def enabled(self):
+        return self._mm is not None
+
+    def attach(self):
+        size = ROW_SIZE * MAX_WORKERS
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size != size:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+            self._mm = mmap.mmap(self._fd, size)
+            for row in range(MAX_WORKERS):
+                pid, _ = HEADER.unpack_from(self._mm, row * ROW_SIZE)
+                # purani heartbeat wala worker abhi startup me ho sakta hai:
+                # row sirf mare hue process ki lo
+                if pid == 0 or not _alive(pid):
+                    self.row = row
+                    break
+            else:
+                raise RuntimeError("shared load table full")
+            self._mm[self.row * ROW_SIZE:(self.row + 1) * ROW_SIZE] = bytes(ROW_SIZE)
+            # pehli heartbeat abhi, start() wala loop bot/clients start hone ke baad chalta hai
+            HEADER.pack_into(self._mm, self.row * ROW_SIZE, os.getpid(), time.monotonic())
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def publish(self, inflight_bytes, work_loads, flood_until):
+        base = self.row * ROW_SIZE
+        for idx in work_loads:
+            if idx < MAX_CLIENTS:
+                SLOT.pack_into(
+                    self._mm,
+                    base + HEADER.size + idx * SLOT.size,
+                    inflight_bytes.get(idx, 0),
+                    work_loads.get(idx, 0),
+                    flood_until.get(idx, 0.0),
+                )
+        HEADER.pack_into(self._mm, base, os.getpid(), time.monotonic())
+
+    def others(self, idx):
+        """Baaki zinda workers me client `idx` ka (bytes, streams, flood_until)."""
+        total_bytes = total_streams = 0
+        flood = 0.0
+        if idx >= MAX_CLIENTS:
+            return total_bytes, total_streams, flood
+        now = time.monotonic()
+        for row in range(MAX_WORKERS):
+            if row == self.row:
+                continue
+            base = row * ROW_SIZE
+            pid, beat = HEADER.unpack_from(self._mm, base)
+            if pid == 0 or now - beat > STALE_AFTER:
+                continue
+            b, s, f = SLOT.unpack_from(self._mm, base + HEADER.size + idx * SLOT.size)
+            total_bytes += b
+            total_streams += s
+            flood = max(flood, f)
+        return total_bytes, total_streams, flood
+
+    def start(self, interval, inflight_bytes, work_loads, flood_until):
+        async def loop():
+            while True:
+                self.publish(inflight_bytes, work_loads, flood_until)
+                await asyncio.sleep(interval)
+
+        self._task = asyncio.create_task(loop())
+
+    def close(self):
+        if self._task:
+            self._task.cancel()
+        if self._mm is not None:
+            HEADER.pack_into(self._mm, self.row * ROW_SIZE, 0, 0.0)
+            self._mm.close()
+            self._mm = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def acquire_bot_lock(path):
+    """Sirf ek worker ko lock milta hai; wahi bot updates handle karega.
+
+    Lock process ke saath zinda rehta hai, isliye fd return karke rakhna hai.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
@@ -0,0 +1,358 @@
+# streaming/streamer.py (part fetcher: metadata, GetFile, read-ahead)
+
+import math
+import time
+import asyncio
+from collections import OrderedDict, deque
+
+from pyrogram import Client, raw
+from pyrogram.errors import (
+    FileReferenceExpired,
+    FloodWait,
+    BadRequest,
+    InternalServerError,
+    ServiceUnavailable,
+)
+from pyrogram.file_id import FileId
+from fastapi import HTTPException
+
+from config import Config
+import metrics
+from .chunk_cache import chunk_cache
+from .sessions import MediaSessionPool
+from .rate_limit import limiter
+from .fair import scheduler
+from .ranges import dc_stats, plan_range, record_part_latency, multipart_header, multipart_tail
+from .pool import (
+    multi_clients,
+    work_loads,
+    inflight_bytes,
+    class_cache,
+    get_client_load,
+    get_least_loaded_client,
+    note_flood_wait,
+)
+
+
+class SingleFlight:
+    """Concurrent callers with the same key share one in-flight fetch."""
+
+    def __init__(self):
+        self._calls = {}  # key -> [future, waiters]
+        self.hits = 0  # requests served by someone else's fetch
+        self.misses = 0  # requests that actually went upstream
+
+    async def do(self, key, fn):
+        call = self._calls.get(key)
+        if call is None or call[0].done():
+            self.misses += 1
+            call = [asyncio.ensure_future(fn()), 0]
+            self._calls[key] = call
+            call[0].add_done_callback(
+                lambda _: self._calls.pop(key) if self._calls.get(key) is call else None
+            )
+        else:
+            self.hits += 1
+        call[1] += 1
+        try:
+            return await asyncio.shield(call[0])
+        finally:
+            call[1] -= 1
+            # last viewer gone (disconnect) -> upstream fetch bhi band
+            if call[1] == 0 and not call[0].done():
+                call[0].cancel()
+
+
+part_flights = SingleFlight()
+
+
+class ByteStreamer:
+    def __init__(self, client: Client, index: int):
+        self.client = client
+        self.index = index
+        self.sessions = MediaSessionPool(
+            client, Config.MEDIA_SESSIONS_PER_DC, Config.SESSION_HEALTH_INTERVAL
+        )
+        # storage message id -> (expires_at, file properties); TTL + LRU
+        self.cached_file_ids = OrderedDict()
+        self.file_flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    async def get_file_properties(self, mid):
+        entry = self.cached_file_ids.get(mid)
+        if entry and entry[0] > time.monotonic():
+            self.cached_file_ids.move_to_end(mid)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return await self.file_flights.do(mid, lambda: self.generate_file_properties(mid))
+
+    async def generate_file_properties(self, mid):
+        await limiter.wait((self.index, "api"), Config.API_RATE, Config.API_BURST)
+        try:
+            msg = await self.client.get_messages(int(Config.STORAGE_CHANNEL), mid)
+        except FloodWait as e:
+            note_flood_wait(self.index, e.value)
+            limiter.pause((self.index, "api"), e.value)
+            raise
+        m = msg.document or msg.video or msg.audio
+        if not m:
+            raise FileNotFoundError
+
+        # ===== MIME TYPE FIX =====
+        fname_lower = (m.file_name or "").lower()
+        if fname_lower.endswith(".mp4"):
+            content_type = "video/mp4"
+        elif fname_lower.endswith(".mkv"):
+            content_type = "video/x-matroska"
+        elif fname_lower.endswith(".webm"):
+            content_type = "video/webm"
+        else:
+            content_type = "application/octet-stream"
+
+        props = {
+            "mid": mid,
+            "file_id": FileId.decode(m.file_id),
+            "file_unique_id": m.file_unique_id,
+            "file_size": m.file_size,
+            "mime_type": content_type,
+            "file_name": m.file_name,
+            "date": msg.date.timestamp() if msg.date else None,
+        }
+        self.cached_file_ids[mid] = (time.monotonic() + Config.MEDIA_CACHE_TTL, props)
+        self.cached_file_ids.move_to_end(mid)
+        while len(self.cached_file_ids) > Config.MEDIA_CACHE_SIZE:
+            self.cached_file_ids.popitem(last=False)
+        return props
+
+    async def refresh_file_properties(self, props):
+        """FILE_REFERENCE_EXPIRED ke baad naya file_reference laata hai."""
+        entry = self.cached_file_ids.get(props["mid"])
+        if entry and entry[1]["file_id"].file_reference != props["file_id"].file_reference:
+            # kisi aur part ne pehle hi refresh kar diya
+            return entry[1]
+        self.cached_file_ids.pop(props["mid"], None)
+        return await self.get_file_properties(props["mid"])
+
+    def latest_props(self, props):
+        """Refresh hua ho to cache wala naya props (chalte stream ke agle parts ke liye)."""
+        entry = self.cached_file_ids.get(props["mid"])
+        if entry and entry[1]["file_unique_id"] == props["file_unique_id"]:
+            return entry[1]
+        return props
+
+    @staticmethod
+    def get_location(f):
+        return raw.types.InputDocumentFileLocation(
+            id=f.media_id,
+            access_hash=f.access_hash,
+            file_reference=f.file_reference,
+            thumb_size=f.thumbnail_size,
+        )
+
+    async def get_part(self, props, offset, cs, viewer=None):
+        uid = props["file_unique_id"]
+        data = await chunk_cache.get(uid, offset, cs)
+        if data is not None:
+            return data
+        return await part_flights.do(
+            (props["file_id"].media_id, offset, cs),
+            lambda: self.fetch_part_fair(props, offset, cs, viewer),
+        )
+
+    async def fetch_part_fair(self, props, offset, cs, viewer):
+        # upstream fetch hi slot leta hai; cache hits / shared flights nahi
+        async with scheduler.slot(viewer):
+            return await self.fetch_part(props, offset, cs)
+
+    @staticmethod
+    async def get_part_retrying(stream, offset, cs, viewer=None):
+        """Part fail ho to doosre pool client pe retry; HTTP response chalta rahe.
+
+        `stream` yield_file ka {"st", "props"} hai: client badla to wahan
+        bhi badalta hai, taaki stream ke baaki parts naye client pe jaayein.
+        """
+        for attempt in range(Config.PART_RETRIES + 1):
+            st, props = stream["st"], stream["props"]
+            try:
+                return await st.get_part(props, offset, cs, viewer)
+            except BadRequest:
+                raise
+            except (FloodWait, InternalServerError, ServiceUnavailable, OSError, TimeoutError) as e:
+                if attempt == Config.PART_RETRIES:
+                    raise
+                print(f"Part {offset} failed on client {st.index}, retrying: {e!r}")
+                error = e
+            if stream["st"] is not st:
+                continue  # kisi aur part ne pehle hi client badal diya
+            try:
+                # FloodWait wala client ab rotation se bahar hai
+                new = await acquire_streamer()
+            except HTTPException:
+                raise error
+            if new is st:
+                await asyncio.sleep(min(0.5 * 2**attempt, 2))
+                continue
+            # har bot ka apna file_id/file_reference hota hai
+            new_props = await new.get_file_properties(props["mid"])
+            if stream["st"] is st:
+                work_loads[st.index] -= 1
+                work_loads[new.index] += 1
+                stream["st"], stream["props"] = new, new_props
+
+    async def invoke_get_file(self, ms, props, offset, cs):
+        return await ms.invoke(
+            raw.functions.upload.GetFile(
+                location=self.get_location(props["file_id"]), offset=offset, limit=cs
+            ),
+            retries=0,
+            sleep_threshold=0,  # FloodWait yahan nahi sote, scheduler ko lautate hain
+        )
+
+    def check_flood_wait(self):
+        """FloodWait chal raha ho to turant raise: paused bucket pe so-ne ke bajaye
+        get_part_retrying doosra client le leta hai."""
+        wait = get_client_load(self.index)[2] - time.monotonic()
+        if wait > 0:
+            raise FloodWait(value=math.ceil(wait))
+
+    async def fetch_part(self, props, offset, cs):
+        dc_id = props["file_id"].dc_id
+        self.check_flood_wait()
+        ms = await self.sessions.get(dc_id)
+        await limiter.wait((self.index, dc_id), Config.GETFILE_RATE, Config.GETFILE_BURST)
+        # bucket me intezaar ke dauran kisi aur part ko FloodWait mila ho
+        self.check_flood_wait()
+        inflight_bytes[self.index] += cs
+        started = time.monotonic()
+        try:
+            try:
+                r = await self.invoke_get_file(ms, props, offset, cs)
+            except FileReferenceExpired:
+                props = await self.refresh_file_properties(props)
+                r = await self.invoke_get_file(ms, props, offset, cs)
+            except (OSError, TimeoutError):
+                # session dead: doosre session pe retry, stream nahi tootega
+                ms = await self.sessions.replace(dc_id, ms)
+                r = await self.invoke_get_file(ms, props, offset, cs)
+        except FloodWait as e:
+            note_flood_wait(self.index, e.value)
+            limiter.pause((self.index, dc_id), e.value)
+            raise
+        finally:
+            inflight_bytes[self.index] -= cs
+        elapsed = time.monotonic() - started
+        record_part_latency(dc_id, len(r.bytes), elapsed)
+        metrics.GETFILE_LATENCY.observe(elapsed, dc_id)
+        await chunk_cache.put(props["file_unique_id"], offset, cs, r.bytes)
+        return r.bytes
+
+    async def yield_file(self, props, offset, fc, lc, pc, cs, viewer=None):
+        # FloodWait pe get_part_retrying isse doosre client pe le jaata hai
+        stream = {"st": self, "props": props}
+        work_loads[self.index] += 1
+        pending = deque()
+        try:
+            # Read-ahead: keep up to `window` parts in flight, bounded by
+            # PREFETCH_MAX_BYTES, and yield them back in order. Parts already
+            # on disk never touch a media session.
+            max_window = max(1, min(Config.PREFETCH_PARTS, Config.PREFETCH_MAX_BYTES // cs))
+            window = max_window
+            rtt = dc_stats.get(props["file_id"].dc_id, {}).get("rtt", 0.05)
+            next_offset = offset
+            queued = 0
+
+            for chunk in range(1, pc + 1):
+                # FILE_REFERENCE_EXPIRED ke baad har part dobara fail na ho
+                stream["props"] = stream["st"].latest_props(stream["props"])
+                while queued < pc and len(pending) < window:
+                    pending.append(
+                        asyncio.ensure_future(
+                            self.get_part_retrying(stream, next_offset, cs, viewer)
+                        )
+                    )
+                    next_offset += cs
+                    queued += 1
+
+                data = await pending.popleft()
+                if not data:
+                    break
+                view = memoryview(data)
+                if pc == 1:
+                    view = view[fc:lc]
+                elif chunk == 1:
+                    view = view[fc:]
+                elif chunk == pc:
+                    view = view[:lc]
+
+                # ByteStreamResponse batata hai send kitni der block hua;
+                # slow client = read-ahead 1 part, taaki bytes memory me na jamein
+                sent = yield view
+                if sent is not None:
+                    window = 1 if sent > rtt else min(max_window, window + 1)
+        finally:
+            # client disconnect / early stop: drop the outstanding requests
+            for t in pending:
+                t.cancel()
+            work_loads[stream["st"].index] -= 1
+
+    def yield_range(self, props, fb, ub, viewer=None):
+        """Byte range [fb, ub] ko aligned parts me baant ke stream karta hai."""
+        return self.yield_file(props, *plan_range(fb, ub, props["file_id"].dc_id), viewer)
+
+    async def yield_multipart(self, props, ranges, boundary, viewer=None):
+        size = props["file_size"]
+        for fb, ub in ranges:
+            yield multipart_header(boundary, props["mime_type"], fb, ub, size)
+            body = self.yield_range(props, fb, ub, viewer)
+            sent = None
+            try:
+                while True:
+                    try:
+                        chunk = await body.asend(sent)
+                    except StopAsyncIteration:
+                        break
+                    # send timing ko andar wale generator tak pahunchao
+                    sent = yield chunk
+            finally:
+                await body.aclose()
+        yield multipart_tail(boundary)
+
+
+def get_streamer(idx=None):
+    if idx is None:
+        idx = get_least_loaded_client()
+    c = multi_clients[idx]
+    st = class_cache.get(c) or ByteStreamer(c, idx)
+    class_cache[c] = st
+    return st
+
+
+async def acquire_streamer():
+    """Least-loaded streamer; sab clients FloodWait me hon to thodi der queue me ruko."""
+    idx = get_least_loaded_client()
+    wait = get_client_load(idx)[2] - time.monotonic()
+    if wait > Config.STREAM_QUEUE_TIMEOUT:
+        raise HTTPException(
+            503,
+            detail="All clients are rate limited, try again later.",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+    if wait > 0:
+        await asyncio.sleep(wait)
+    return get_streamer(idx)
+
+
+async def prewarm_media_sessions():
+    """Har client ke liye home DC + PREWARM_DCS ke media sessions pehle se."""
+
+    async def prewarm(index, c):
+        # pehle se bana streamer (kisi request/job ne) replace na ho, warna uske sessions leak
+        st = get_streamer(index)
+        try:
+            await st.sessions.prewarm([await c.storage.dc_id(), *Config.PREWARM_DCS])
+        except Exception as e:
+            print(f"❌ Session prewarm failed for client {index}: {e}")
+
+    await asyncio.gather(*(prewarm(i, c) for i, c in multi_clients.items()))
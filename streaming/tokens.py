@@ -0,0 +1,121 @@
+# streaming/tokens.py (HMAC-signed stream links: /dl + /api/file bina Mongo/get_messages)
+
+import os
+import hmac
+import math
+import time
+import base64
+import struct
+import hashlib
+import binascii
+
+from config import Config
+
+VERSION = 2  # v2: fuid ke baad link id (HLS ke liye); v1 tokens bhi chalte hain
+MAC_SIZE = 16
+HEAD = struct.Struct(">BIIQB")  # version, mid, expires (0 = kabhi nahi), size, mime code
+# aam mime types ek byte me; baaki literal (code 255)
+MIME_CODES = (
+    "application/octet-stream",
+    "video/mp4",
+    "video/x-matroska",
+    "video/webm",
+    "audio/mpeg",
+    "audio/mp4",
+    "audio/ogg",
+)
+MIME_LITERAL = 255
+MAX_MIME_BYTES = 100
+MAX_NAME_BYTES = 200  # user ka likha naam lamba ho sakta hai; token URL me jaata hai
+# sabse bada valid token: head + fuid + link id (255 tak) + mime + naam + mac
+MAX_TOKEN_LEN = math.ceil(
+    (HEAD.size + 2 * 256 + 1 + MAX_MIME_BYTES + MAX_NAME_BYTES + MAC_SIZE) * 4 / 3
+)
+
+
+def _secret():
+    if Config.LINK_SECRET:
+        return Config.LINK_SECRET.encode()
+    # sab nodes ke paas same bot token hai, to same key
+    return hashlib.sha256(b"stream-link:" + Config.BOT_TOKEN.encode()).digest()
+
+
+def _mac(payload):
+    return hmac.new(_secret(), payload, hashlib.sha256).digest()[:MAC_SIZE]
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _utf8_prefix(text, limit):
+    return text.encode()[:limit].decode("utf-8", "ignore")
+
+
+def _short_name(file_name):
+    """MAX_NAME_BYTES tak ka naam, UTF-8 boundary pe kata; extension bachi rehti hai."""
+    if len(file_name.encode()) <= MAX_NAME_BYTES:
+        return file_name
+    root, ext = os.path.splitext(file_name)
+    if len(ext.encode()) > 16:
+        root, ext = file_name, ""
+    return _utf8_prefix(root, MAX_NAME_BYTES - len(ext.encode())) + ext
+
+
+def sign_link(mid, file_unique_id, file_size, mime_type, file_name="", ttl=None, link_id=""):
+    """Compact token: message id, file_unique_id, size, mime, expiry (+ optional naam,
+    links doc ka _id)."""
+    ttl = Config.SIGNED_LINK_TTL if ttl is None else ttl
+    expires = int(time.time() + ttl) if ttl > 0 else 0
+    mime_type = mime_type or "application/octet-stream"
+    code = MIME_CODES.index(mime_type) if mime_type in MIME_CODES else MIME_LITERAL
+    fuid = file_unique_id.encode()
+    lid = link_id.encode()[:255]
+    payload = HEAD.pack(VERSION, mid, expires, file_size or 0, code) + bytes([len(fuid)]) + fuid
+    payload += bytes([len(lid)]) + lid
+    if code == MIME_LITERAL:
+        mime = _utf8_prefix(mime_type, MAX_MIME_BYTES).encode()
+        payload += bytes([len(mime)]) + mime
+    payload += _short_name(file_name).encode()
+    return _b64(payload + _mac(payload))
+
+
+def verify_link(token):
+    """Sahi aur valid token ka dict; warna None (galat signature / expired / kharab)."""
+    if not token or len(token) > MAX_TOKEN_LEN:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (binascii.Error, ValueError):
+        return None
+    payload, mac = raw[:-MAC_SIZE], raw[-MAC_SIZE:]
+    if len(payload) < HEAD.size + 1 or not hmac.compare_digest(mac, _mac(payload)):
+        return None
+    version, mid, expires, size, code = HEAD.unpack_from(payload)
+    if version not in (1, VERSION) or (expires and expires < time.time()):
+        return None
+    try:
+        pos = HEAD.size + 1
+        fuid = payload[pos:pos + payload[HEAD.size]].decode()
+        pos += payload[HEAD.size]
+        link_id = ""
+        if version >= 2:
+            link_id = payload[pos + 1:pos + 1 + payload[pos]].decode()
+            pos += 1 + payload[pos]
+        if code == MIME_LITERAL:
+            mime_type = payload[pos + 1:pos + 1 + payload[pos]].decode()
+            pos += 1 + payload[pos]
+        else:
+            mime_type = MIME_CODES[code]
+        file_name = payload[pos:].decode()
+    except (IndexError, UnicodeDecodeError):
+        return None
+    return {
+        "mid": mid,
+        "file_unique_id": fuid,
+        "file_size": size,
+        "mime_type": mime_type,
+        "file_name": file_name,
+        "link_id": link_id,
+        "expires": expires,
+    }
@@ -0,0 +1,10 @@
+# tests/conftest.py (repo root import path + dummy bot credentials)
+
+import os
+import sys
+
+os.environ.setdefault("BOT_TOKEN", "123:test")
+os.environ.setdefault("API_ID", "1")
+os.environ.setdefault("API_HASH", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
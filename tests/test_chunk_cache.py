@@ -0,0 +1,101 @@
+# tests/test_chunk_cache.py (disk part cache: LRU/LFU eviction, reload, worker split)
+
+import asyncio
+
+from streaming.chunk_cache import ChunkCache
+
+PART = b"x" * 100
+
+
+def opened(tmp_path, policy, max_bytes=300):
+    cache = ChunkCache(str(tmp_path / "cache"), max_bytes, policy)
+    cache.open()
+    return cache
+
+
+def fill(cache, *offsets):
+    for off in offsets:
+        asyncio.run(cache.put("F", off, 100, PART))
+
+
+def hit(cache, off, times=1):
+    for _ in range(times):
+        assert asyncio.run(cache.get("F", off, 100)) == PART
+
+
+def test_closed_cache_does_nothing(tmp_path):
+    cache = ChunkCache(str(tmp_path / "cache"), 300)
+    fill(cache, 0)
+    assert not cache.has("F", 0, 100)
+    assert not (tmp_path / "cache").exists()
+
+
+def test_lru_evicts_least_recent(tmp_path):
+    cache = opened(tmp_path, "lru")
+    fill(cache, 0, 100, 200)
+    hit(cache, 0)
+    fill(cache, 300)
+    assert [cache.has("F", o, 100) for o in (0, 100, 200, 300)] == [True, False, True, True]
+    assert cache._used == 300
+    assert not (tmp_path / "cache" / "F" / "100_100.part").exists()
+
+
+def test_lfu_keeps_hot_parts(tmp_path):
+    cache = opened(tmp_path, "lfu")
+    fill(cache, 0, 100, 200)
+    hit(cache, 0, 3)
+    hit(cache, 100, 1)
+    hit(cache, 200, 2)
+    fill(cache, 300)  # naya part (0 hits) hi sabse thanda
+    assert [cache.has("F", o, 100) for o in (0, 100, 200, 300)] == [True, True, True, False]
+    assert cache._used == 300
+    assert sum(len(b) for b in cache._buckets.values()) == len(cache._index)
+
+
+def test_lfu_ties_evict_oldest(tmp_path):
+    cache = opened(tmp_path, "lfu")
+    fill(cache, 0, 100, 200)
+    hit(cache, 200)
+    cache.max_bytes = 200
+    cache._evict()
+    assert [cache.has("F", o, 100) for o in (0, 100, 200)] == [False, True, True]
+    cache.max_bytes = 100
+    cache._evict()
+    assert [cache.has("F", o, 100) for o in (0, 100, 200)] == [False, False, True]
+    assert list(cache._buckets) == [1]
+
+
+def test_lfu_evicts_min_hits_first(tmp_path):
+    cache = opened(tmp_path, "lfu", max_bytes=200)
+    fill(cache, 0, 100)
+    hit(cache, 0, 2)
+    hit(cache, 100, 1)
+    cache.max_bytes = 100
+    cache._evict()
+    assert cache.has("F", 0, 100) and not cache.has("F", 100, 100)
+
+
+def test_read_is_zero_copy_view(tmp_path):
+    cache = opened(tmp_path, "lru")
+    fill(cache, 0)
+    data = asyncio.run(cache.get("F", 0, 100))
+    assert isinstance(data, memoryview) and data.readonly
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert asyncio.run(cache.get("F", 100, 100)) is None
+    assert cache.misses == 1
+
+
+def test_reopen_restores_index(tmp_path):
+    fill(opened(tmp_path, "lru"), 0, 100)
+    again = opened(tmp_path, "lru")
+    assert again.has("F", 0, 100) and again.has("F", 100, 100)
+    assert again._used == 200
+
+
+def test_workers_split_directory_and_budget(tmp_path):
+    cache = ChunkCache(str(tmp_path / "cache"), 1000)
+    cache.open(worker=2, workers=4)
+    assert cache.max_bytes == 250
+    assert cache.root.endswith("worker2")
+    fill(cache, 0)
+    assert (tmp_path / "cache" / "worker2" / "F" / "0_100.part").exists()
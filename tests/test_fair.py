@@ -0,0 +1,140 @@
+# tests/test_fair.py (admission control + weighted round-robin part slots)
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from streaming.fair import FairScheduler
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_connection_cap_is_429_and_leave_forgets_viewer():
+    sched = FairScheduler(slots=4, max_connections=2, max_parts=0)
+    a = sched.admit("ip|link")
+    assert sched.admit("ip|link") is a and a.connections == 2
+    with pytest.raises(HTTPException) as e:
+        sched.admit("ip|link")
+    assert e.value.status_code == 429 and "Retry-After" in e.value.headers
+    # doosra link alag viewer hai
+    assert sched.admit("ip|other") is not a
+    sched.leave(a)
+    sched.leave(a)
+    assert "ip|link" not in sched.viewers
+
+
+def test_overload_is_503():
+    async def main():
+        sched = FairScheduler(slots=1, max_connections=0, max_parts=2)
+        hold, started = asyncio.Event(), asyncio.Event()
+
+        async def part(viewer):
+            async with sched.slot(viewer):
+                started.set()
+                await hold.wait()
+
+        viewer = sched.admit("a")
+        tasks = [asyncio.create_task(part(viewer)) for _ in range(2)]
+        await started.wait()
+        await asyncio.sleep(0)
+        assert (sched.inflight, sched.waiting) == (1, 1)
+        with pytest.raises(HTTPException) as e:
+            sched.admit("b")
+        assert e.value.status_code == 503
+        hold.set()
+        await asyncio.gather(*tasks)
+        assert (sched.inflight, sched.waiting) == (0, 0)
+        assert sched.admit("b").connections == 1
+
+    run(main())
+
+
+def test_weighted_round_robin_order():
+    async def main():
+        sched = FairScheduler(slots=1, max_connections=0, max_parts=0)
+        heavy, light = sched.admit("heavy", weight=2), sched.admit("light")
+        hold, order = asyncio.Event(), []
+
+        async def holder():
+            async with sched.slot():
+                await hold.wait()
+
+        async def part(viewer, name):
+            async with sched.slot(viewer):
+                order.append(name)
+
+        tasks = [asyncio.create_task(holder())]
+        await asyncio.sleep(0)
+        # download manager ke 6 parts pehle queue me, phir light viewer ke 3
+        for viewer, name, n in ((heavy, "H", 6), (light, "L", 3)):
+            for _ in range(n):
+                tasks.append(asyncio.create_task(part(viewer, name)))
+                await asyncio.sleep(0)
+        hold.set()
+        await asyncio.gather(*tasks)
+        assert "".join(order) == "HHLHHLHHL"
+        assert not sched.ready and sched.inflight == 0
+
+    run(main())
+
+
+def test_cancelled_waiter_gives_up_its_turn():
+    async def main():
+        sched = FairScheduler(slots=1, max_connections=0, max_parts=0)
+        a, b = sched.admit("a"), sched.admit("b")
+        hold, order = asyncio.Event(), []
+
+        async def holder():
+            async with sched.slot():
+                await hold.wait()
+
+        async def part(viewer, name):
+            async with sched.slot(viewer):
+                order.append(name)
+
+        first = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        gone = asyncio.create_task(part(a, "A"))
+        await asyncio.sleep(0)
+        stays = asyncio.create_task(part(b, "B"))
+        await asyncio.sleep(0)
+        assert sched.waiting == 2
+        gone.cancel()
+        await asyncio.sleep(0)
+        assert sched.waiting == 1 and list(sched.ready) == [b]
+        hold.set()
+        await asyncio.gather(first, stays)
+        assert order == ["B"] and sched.inflight == 0
+
+    run(main())
+
+
+def test_leave_keeps_viewer_with_waiters():
+    async def main():
+        sched = FairScheduler(slots=1, max_connections=0, max_parts=0)
+        viewer = sched.admit("a")
+        hold = asyncio.Event()
+
+        async def holder():
+            async with sched.slot():
+                await hold.wait()
+
+        async def part():
+            async with sched.slot(viewer):
+                pass
+
+        first = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(part())
+        await asyncio.sleep(0)
+        sched.leave(viewer)
+        # connection band, lekin queue me part baaki: turn tak viewer rehta hai
+        assert sched.viewers.get("a") is viewer
+        hold.set()
+        await asyncio.gather(first, queued)
+        assert "a" not in sched.viewers
+
+    run(main())
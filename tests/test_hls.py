@@ -0,0 +1,30 @@
+# tests/test_hls.py (HLS link eligibility + keyframe segment planning)
+
+from streaming.hls import hls_supported, plan_segments
+
+
+def media(**kw):
+    return {"container": "matroska", "codecs": ["avc1", "mp4a.40.2"], "keyframe_count": 3, **kw}
+
+
+def test_hls_needs_keyframes():
+    assert hls_supported(media())
+    # Cues / stss nahi mile: playlist ban hi nahi sakti
+    assert not hls_supported(media(keyframe_count=0))
+    assert not hls_supported({k: v for k, v in media().items() if k != "keyframe_count"})
+
+
+def test_hls_needs_aac_audio_and_h264_h265():
+    assert not hls_supported(media(codecs=["avc1", "ac-3"]))
+    assert hls_supported(media(codecs=["hvc1", "ec-3", "mp4a.40.2"]))
+    assert not hls_supported(media(codecs=["vp09", "opus"]))
+    assert not hls_supported(None)
+
+
+def test_plan_segments_cut_at_keyframes():
+    keyframes = [[0.0, 100], [2.0, 200], [6.5, 300], [7.0, 400], [13.0, 500]]
+    assert plan_segments(keyframes, 15.0, 6) == [
+        (0.0, 100, 6.5),
+        (6.5, 300, 6.5),
+        (13.0, 500, 2.0),
+    ]
@@ -0,0 +1,61 @@
+# tests/test_http_cache.py (ETag / Last-Modified validators, If-Range, Cache-Control)
+
+from config import Config
+from streaming.http_cache import (
+    cache_control_for,
+    http_date,
+    if_range_matches,
+    is_not_modified,
+    make_etag,
+)
+
+ETAG = make_etag("AgADxyz", 1000)
+MTIME = 1_700_000_000
+
+
+def test_etag_is_strong_and_stable():
+    assert ETAG == '"AgADxyz-1000"'
+    assert make_etag("AgADxyz", 1001) != ETAG
+
+
+def test_if_none_match():
+    assert is_not_modified({"If-None-Match": ETAG}, ETAG, MTIME)
+    assert is_not_modified({"If-None-Match": f'"other", W/{ETAG}'}, ETAG, MTIME)
+    assert is_not_modified({"If-None-Match": "*"}, ETAG, MTIME)
+    assert not is_not_modified({"If-None-Match": '"other"'}, ETAG, MTIME)
+
+
+def test_if_none_match_wins_over_if_modified_since():
+    headers = {"If-None-Match": '"other"', "If-Modified-Since": http_date(MTIME + 60)}
+    assert not is_not_modified(headers, ETAG, MTIME)
+
+
+def test_if_modified_since():
+    assert is_not_modified({"If-Modified-Since": http_date(MTIME)}, ETAG, MTIME)
+    assert not is_not_modified({"If-Modified-Since": http_date(MTIME - 1)}, ETAG, MTIME)
+    assert not is_not_modified({"If-Modified-Since": "garbage"}, ETAG, MTIME)
+    # Last-Modified pata nahi to 304 nahi
+    assert not is_not_modified({"If-Modified-Since": http_date(MTIME)}, ETAG, None)
+
+
+def test_if_range():
+    assert if_range_matches({}, ETAG, MTIME)
+    assert if_range_matches({"If-Range": ETAG}, ETAG, MTIME)
+    # weak ETag aur doosra ETag: range ignore, poori file
+    assert not if_range_matches({"If-Range": f"W/{ETAG}"}, ETAG, MTIME)
+    assert not if_range_matches({"If-Range": '"other"'}, ETAG, MTIME)
+    assert if_range_matches({"If-Range": http_date(MTIME)}, ETAG, MTIME)
+    assert not if_range_matches({"If-Range": http_date(MTIME - 5)}, ETAG, MTIME)
+    assert not if_range_matches({"If-Range": http_date(MTIME)}, ETAG, None)
+
+
+def test_cache_control_rules(monkeypatch):
+    monkeypatch.setattr(
+        Config, "CACHE_CONTROL",
+        {"video/mp4": "public, max-age=60", "video/*": "public, max-age=10", "*": "no-store"},
+    )
+    assert cache_control_for("video/mp4") == "public, max-age=60"
+    assert cache_control_for("video/x-matroska") == "public, max-age=10"
+    assert cache_control_for("application/zip") == "no-store"
+    monkeypatch.setattr(Config, "CACHE_CONTROL", {})
+    assert cache_control_for("video/mp4") == "no-cache"
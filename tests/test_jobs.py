@@ -0,0 +1,160 @@
+# tests/test_jobs.py (durable job queue: save, batching, retry, FloodWait, flush)
+
+import time
+import asyncio
+
+import pytest
+from pyrogram.errors import FloodWait, MessageIdInvalid
+
+import jobs as jobs_mod
+from config import Config
+
+
+class FakeDB:
+    def __init__(self):
+        self.saved, self.deleted, self.rescheduled = [], [], []
+        self.fail_save = False
+
+    async def save_jobs(self, jobs):
+        if self.fail_save:
+            raise ConnectionError("mongo down")
+        self.saved.extend(j["_id"] for j in jobs)
+
+    async def delete_jobs(self, job_ids):
+        self.deleted.extend(sorted(job_ids))
+
+    async def reschedule_job(self, job_id, attempts, run_at):
+        self.rescheduled.append((job_id, attempts))
+
+    async def load_jobs(self):
+        return []
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(jobs_mod, "db", fake)
+    monkeypatch.setattr(Config, "JOB_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(Config, "JOB_BATCH_SIZE", 2)
+    return fake
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_put_saves_before_returning(fake_db):
+    async def main():
+        queue = jobs_mod.JobQueue()
+        job_id = await queue.put("caption", {"mid": 1}, chat_id=5)
+        assert fake_db.saved == [job_id] and job_id in queue.jobs
+        # Mongo down: job phir bhi chalta hai, save agle flush pe
+        fake_db.fail_save = True
+        late = await queue.put("caption", {"mid": 2})
+        assert late in queue.jobs and queue._unsaved[0]["_id"] == late
+        fake_db.fail_save = False
+        await queue._flush()
+        assert fake_db.saved == [job_id, late] and not queue._unsaved
+
+    run(main())
+
+
+def test_batch_handler_gets_grouped_payloads(fake_db):
+    async def main():
+        queue, calls = jobs_mod.JobQueue(), []
+
+        @queue.handler("links", batch=True)
+        async def links(payloads):
+            calls.append(payloads)
+
+        @queue.handler("one")
+        async def one(payload):
+            calls.append(payload)
+
+        for i in range(3):
+            await queue.put("links", i)
+        await queue.put("one", "x")
+        queue._dispatch()
+        await asyncio.gather(*queue._running)
+        # JOB_BATCH_SIZE=2: do batch, aur single job alag
+        assert sorted(map(str, calls)) == ["[0, 1]", "[2]", "x"]
+        assert not queue.jobs and len(queue._finished) == 4
+
+    run(main())
+
+
+def test_failure_retries_with_backoff_then_drops(fake_db):
+    async def main():
+        queue = jobs_mod.JobQueue()
+
+        @queue.handler("flaky")
+        async def flaky(payload):
+            raise RuntimeError("boom")
+
+        job_id = await queue.put("flaky", None)
+        job = queue.jobs[job_id]
+        before = job["run_at"]
+        await queue._execute([job])
+        assert job["attempts"] == 1 and job["run_at"] >= before + 5
+        await queue._execute([job])
+        assert fake_db.rescheduled == [(job_id, 1), (job_id, 2)]
+        await queue._execute([job])
+        # JOB_MAX_ATTEMPTS=3: ab drop
+        assert job_id not in queue.jobs and queue._finished == [job_id]
+        await queue._flush()
+        assert fake_db.deleted == [job_id]
+
+    run(main())
+
+
+def test_flood_wait_pauses_chat_without_counting(fake_db):
+    async def main():
+        queue = jobs_mod.JobQueue()
+
+        @queue.handler("caption")
+        async def caption(payload):
+            raise FloodWait(value=30)
+
+        job_id = await queue.put("caption", None, chat_id=7)
+        job = queue.jobs[job_id]
+        await queue._execute([job])
+        assert job["attempts"] == 0 and fake_db.rescheduled == [(job_id, 0)]
+        assert job["run_at"] >= time.time() + 29
+        # chat ki bucket 30 sec ke liye khaali
+        assert queue._chats._buckets[7].tokens < -29 * Config.JOB_CHAT_RATE
+
+    run(main())
+
+
+def test_bad_request_fails_permanently(fake_db):
+    async def main():
+        queue = jobs_mod.JobQueue()
+
+        @queue.handler("caption")
+        async def caption(payload):
+            raise MessageIdInvalid()
+
+        job_id = await queue.put("caption", None)
+        await queue._execute([queue.jobs[job_id]])
+        assert job_id not in queue.jobs and not fake_db.rescheduled
+
+    run(main())
+
+
+def test_flush_skips_jobs_finished_before_save(fake_db):
+    async def main():
+        queue = jobs_mod.JobQueue()
+
+        @queue.handler("one")
+        async def one(payload):
+            pass
+
+        fake_db.fail_save = True
+        job_id = await queue.put("one", None)
+        fake_db.fail_save = False
+        await queue._execute([queue.jobs[job_id]])
+        await queue._flush()
+        # kabhi save hi nahi hua: na insert, na delete
+        assert fake_db.saved == [] and fake_db.deleted == []
+
+    run(main())
@@ -0,0 +1,66 @@
+# tests/test_part_planning.py (GetFile part size + range -> aligned parts)
+
+import random
+
+import pytest
+
+from streaming.ranges import (
+    MAX_PART_SIZE,
+    MIN_PART_SIZE,
+    choose_part_size,
+    dc_stats,
+    plan_range,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_dc_stats():
+    saved = dict(dc_stats)
+    dc_stats.clear()
+    yield
+    dc_stats.clear()
+    dc_stats.update(saved)
+
+
+def covered(fb, ub, plan):
+    """plan ke parts yield_file ki tarah kaat ke (start, length)."""
+    off, fc, lc, pc, cs = plan
+    if pc == 1:
+        return off + fc, lc - fc
+    return off + fc, (cs - fc) + (pc - 2) * cs + lc
+
+
+def test_part_size_follows_range_length():
+    assert choose_part_size(0, 99, 2) == MIN_PART_SIZE
+    assert choose_part_size(0, 10_000, 2) == 16 * 1024
+    assert choose_part_size(0, 50 * 1024 * 1024, 2) == MAX_PART_SIZE
+
+
+def test_slow_dc_gets_bigger_parts():
+    # 200 ms rtt, 1 MB/s: 4 KB probe bhi bada part le leta hai
+    dc_stats[4] = {"rtt": 0.2, "bw": 1024 * 1024}
+    assert choose_part_size(0, 99, 4) > MIN_PART_SIZE
+    assert choose_part_size(0, 99, 4) <= MAX_PART_SIZE
+
+
+def test_plan_obeys_getfile_rules_and_covers_range():
+    rng = random.Random(7)
+    size = 3 * 1024 ** 3
+    for _ in range(2000):
+        fb = rng.randrange(size)
+        ub = min(size - 1, fb + rng.choice((0, 1, 4095, 4096, 70_000, 2 ** 20, 5 * 2 ** 20)))
+        off, fc, lc, pc, cs = plan = plan_range(fb, ub, 2)
+        # limit 4 KB..1 MB, 1 MB ko divide kare, offset limit se divisible
+        assert MIN_PART_SIZE <= cs <= MAX_PART_SIZE and MAX_PART_SIZE % cs == 0
+        assert off % cs == 0 and off <= fb
+        assert 0 <= fc < cs and 0 < lc <= cs
+        assert covered(fb, ub, plan) == (fb, ub - fb + 1)
+
+
+def test_part_boundaries():
+    assert plan_range(0, 4095, 2) == (0, 0, 4096, 1, 4096)
+    # ek byte agle part me
+    off, fc, lc, pc, cs = plan_range(4095, 4096, 2)
+    assert (pc, cs, fc, lc) == (2, 4096, 4095, 1)
+    # last byte of a 1 MB aligned part
+    assert plan_range(2 ** 20 - 1, 2 ** 20 - 1, 2) == (2 ** 20 - 4096, 4095, 4096, 1, 4096)
@@ -0,0 +1,177 @@
+# tests/test_probe.py (ingest probe: MP4 moov at end, MKV cues via SeekHead)
+
+import struct
+import asyncio
+
+import pytest
+
+from streaming.fmp4 import box, full_box
+from streaming.probe import ProbeError, probe
+
+SAMPLE = 1000  # bytes per sample
+
+
+def run_probe(data, limit=16 * 1024 * 1024):
+    async def read(start, end):
+        return data[start:end + 1]
+
+    return asyncio.run(probe(read, len(data), limit))
+
+
+# ==============================================
+# MP4
+# ==============================================
+def mp4_moov_at_end(samples=10, sync=(1, 6)):
+    """ftyp, mdat, moov: 1 sample/chunk, har sample 1 sec."""
+    ftyp = box(b"ftyp", b"isom", struct.pack(">I", 0), b"isom")
+    mdat = box(b"mdat", bytes(samples * SAMPLE))
+    data_start = len(ftyp) + 8
+    mvhd = full_box(b"mvhd", 0, 0, struct.pack(">IIII", 0, 0, 1000, samples * 1000), bytes(80))
+    stbl = box(
+        b"stbl",
+        # avc1 entry bina avcC: codec sirf "avc1"
+        full_box(b"stsd", 0, 0, struct.pack(">I", 1), struct.pack(">I4s", 86, b"avc1"), bytes(78)),
+        full_box(b"stts", 0, 0, struct.pack(">III", 1, samples, 1000)),
+        full_box(b"stss", 0, 0, struct.pack(f">I{len(sync)}I", len(sync), *sync)),
+        full_box(b"stsc", 0, 0, struct.pack(">IIII", 1, 1, 1, 1)),
+        full_box(b"stsz", 0, 0, struct.pack(">II", SAMPLE, samples)),
+        full_box(
+            b"stco", 0, 0,
+            struct.pack(f">I{samples}I", samples, *(data_start + i * SAMPLE for i in range(samples))),
+        ),
+    )
+    trak = box(
+        b"trak",
+        box(
+            b"mdia",
+            full_box(b"mdhd", 0, 0, struct.pack(">IIII", 0, 0, 1000, samples * 1000), bytes(4)),
+            full_box(b"hdlr", 0, 0, bytes(4), b"vide", bytes(12)),
+            box(b"minf", stbl),
+        ),
+    )
+    moov = box(b"moov", mvhd, trak)
+    return ftyp + mdat + moov, len(ftyp), data_start
+
+
+def test_mp4_moov_at_end():
+    data, mdat_pos, data_start = mp4_moov_at_end()
+    media = run_probe(data)
+    moov_pos = mdat_pos + 8 + 10 * SAMPLE
+    assert media["container"] == "mp4"
+    assert media["mime_type"] == "video/mp4"
+    assert media["duration"] == 10.0
+    assert media["codecs"] == ["avc1"]
+    assert media["index"] == [moov_pos, len(data) - 1]
+    # moov baad me: header = ftyp + mdat box header
+    assert media["header"] == [0, mdat_pos + 15]
+    assert media["keyframes"] == [[0.0, data_start], [5.0, data_start + 5 * SAMPLE]]
+
+
+def test_mp4_probe_budget():
+    data, _, _ = mp4_moov_at_end()
+    # moov padhne tak budget khatam
+    with pytest.raises(ProbeError):
+        run_probe(data, limit=200)
+
+
+def test_fragmented_mp4_has_no_index():
+    data = box(b"ftyp", b"isom", bytes(4)) + box(b"moof", bytes(16)) + box(b"mdat", bytes(64))
+    assert run_probe(data) is None
+
+
+# ==============================================
+# MATROSKA
+# ==============================================
+def el(eid, *payload):
+    """EBML element, size hamesha 8-byte vint (offsets pehle se pata rahein)."""
+    data = b"".join(payload)
+    return eid + b"\x01" + len(data).to_bytes(7, "big") + data
+
+
+def uint(eid, value):
+    return el(eid, value.to_bytes(8, "big"))
+
+
+def mkv_cues_at_end(cluster_bytes=100 * 1024):
+    """Do clusters (0s, 5s) ke baad Cues; Cues head (64 KB) ke baahar."""
+    header = el(b"\x1a\x45\xdf\xa3", el(b"\x42\x82", b"matroska"))
+    info = el(
+        b"\x15\x49\xa9\x66",
+        uint(b"\x2a\xd7\xb1", 1000000),
+        el(b"\x44\x89", struct.pack(">d", 10000.0)),
+    )
+    tracks = el(
+        b"\x16\x54\xae\x6b",
+        el(b"\xae", uint(b"\xd7", 1), uint(b"\x83", 1), el(b"\x86", b"V_MPEG4/ISO/AVC")),
+        el(b"\xae", uint(b"\xd7", 2), uint(b"\x83", 2), el(b"\x86", b"A_AC3")),
+    )
+    clusters = el(b"\x1f\x43\xb6\x75", bytes(cluster_bytes)) * 2
+
+    def seek_head(cues_rel):
+        return el(
+            b"\x11\x4d\x9b\x74",
+            el(b"\x4d\xbb", el(b"\x53\xab", b"\x1c\x53\xbb\x6b"), uint(b"\x53\xac", cues_rel)),
+        )
+
+    head_len = len(seek_head(0)) + len(info) + len(tracks)
+    cluster_rel = [head_len, head_len + len(clusters) // 2]
+    cues = el(
+        b"\x1c\x53\xbb\x6b",
+        *(
+            el(
+                b"\xbb",
+                uint(b"\xb3", t),
+                el(b"\xb7", uint(b"\xf7", 1), uint(b"\xf1", rel)),
+            )
+            for t, rel in zip((0, 5000), cluster_rel)
+        ),
+    )
+    body = seek_head(head_len + len(clusters)) + info + tracks + clusters + cues
+    segment = el(b"\x18\x53\x80\x67", body)
+    seg_start = len(header) + 12
+    return header + segment, seg_start, cluster_rel, len(cues)
+
+
+def test_mkv_cues_via_seek_head():
+    data, seg_start, cluster_rel, cues_len = mkv_cues_at_end()
+    media = run_probe(data)
+    assert media["container"] == "matroska"
+    assert media["mime_type"] == "video/x-matroska"
+    assert media["duration"] == 10.0
+    assert media["codecs"] == ["avc1", "ac-3"]
+    assert media["header"] == [0, seg_start + cluster_rel[0] - 1]
+    assert media["index"] == [len(data) - cues_len, len(data) - 1]
+    assert media["keyframes"] == [
+        [0.0, seg_start + cluster_rel[0]],
+        [5.0, seg_start + cluster_rel[1]],
+    ]
+
+
+def test_unknown_container():
+    assert run_probe(bytes(128)) is None
+
+
+# ==============================================
+# INDEX CACHE
+# ==============================================
+def test_index_miss_expires_quickly(monkeypatch):
+    from database import db
+    from streaming import media_index
+
+    now = [1000.0]
+    calls = []
+
+    async def get_media(file_unique_id):
+        calls.append(file_unique_id)
+        return None if len(calls) == 1 else {"container": "mp4"}
+
+    monkeypatch.setattr(media_index.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(db, "get_media", get_media)
+    assert asyncio.run(media_index.get_index("late")) is None
+    assert asyncio.run(media_index.get_index("late")) is None  # miss cached
+    # ingest job ke baad index thodi hi der me dikhna chahiye
+    now[0] += media_index.INDEX_MISS_TTL + 1
+    assert asyncio.run(media_index.get_index("late")) == {"container": "mp4"}
+    now[0] += 60
+    assert asyncio.run(media_index.get_index("late")) == {"container": "mp4"}
+    assert calls == ["late", "late"]
@@ -0,0 +1,51 @@
+# tests/test_ranges.py (Range header parsing: suffix, clamp, coalesce, 416)
+
+import pytest
+
+from streaming.ranges import MAX_RANGES, RangeNotSatisfiable, parse_range
+
+
+def test_no_header_or_other_unit_is_full_file():
+    assert parse_range("", 1000) is None
+    assert parse_range("items=0-10", 1000) is None
+
+
+def test_simple_and_open_ended():
+    assert parse_range("bytes=0-99", 1000) == [(0, 99)]
+    assert parse_range("bytes=900-", 1000) == [(900, 999)]
+
+
+def test_suffix_range():
+    assert parse_range("bytes=-100", 1000) == [(900, 999)]
+    # file se bada suffix poori file
+    assert parse_range("bytes=-5000", 1000) == [(0, 999)]
+
+
+def test_end_clamped_to_size():
+    assert parse_range("bytes=900-5000", 1000) == [(900, 999)]
+
+
+def test_overlapping_and_adjacent_ranges_coalesce():
+    assert parse_range("bytes=200-299,0-99,50-199", 1000) == [(0, 299)]
+    assert parse_range("bytes=0-9,20-29", 1000) == [(0, 9), (20, 29)]
+
+
+def test_too_many_ranges_collapse_to_one():
+    spec = ",".join(f"{i * 10}-{i * 10 + 1}" for i in range(MAX_RANGES + 1))
+    assert parse_range(f"bytes={spec}", 1000) == [(0, MAX_RANGES * 10 + 1)]
+
+
+def test_unsatisfiable_raises_416():
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=1000-", 1000)
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=-0", 1000)
+
+
+def test_out_of_file_parts_are_dropped():
+    assert parse_range("bytes=5000-6000,0-9", 1000) == [(0, 9)]
+
+
+@pytest.mark.parametrize("header", ["bytes=5-1", "bytes=a-b", "bytes=-", "bytes=10"])
+def test_malformed_is_ignored(header):
+    assert parse_range(header, 1000) is None
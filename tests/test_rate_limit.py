@@ -0,0 +1,102 @@
+# tests/test_rate_limit.py (token buckets: burst, steady rate, FloodWait pause)
+
+import asyncio
+
+import pytest
+
+from streaming import rate_limit
+from streaming.rate_limit import TokenBucket, RateLimiter
+
+
+class Clock:
+    """Nakli monotonic clock; sleep sirf waqt aage badhata hai."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+        self.frozen = False  # True: sleep waqt nahi badhata (concurrent waiters)
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.slept.append(round(seconds, 6))
+        if not self.frozen:
+            self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", clock.sleep)
+    return clock
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_burst_then_steady_rate(clock):
+    async def main():
+        bucket = TokenBucket(rate=2, burst=3)
+        for _ in range(3):
+            await bucket.acquire()
+        assert clock.slept == []
+        await bucket.acquire()
+        await bucket.acquire()
+        assert clock.slept == [0.5, 0.5]
+
+    run(main())
+
+
+def test_queued_waiters_sleep_in_arrival_order(clock):
+    async def main():
+        bucket = TokenBucket(rate=1, burst=1)
+        clock.frozen = True
+        # ek saath aaye teen: har ek apni baari tak so-ta hai
+        await asyncio.gather(*(bucket.acquire() for _ in range(3)))
+        assert clock.slept == [1, 2]
+
+    run(main())
+
+
+def test_idle_refill_is_capped_at_burst(clock):
+    async def main():
+        bucket = TokenBucket(rate=1, burst=2)
+        clock.now += 3600
+        for _ in range(3):
+            await bucket.acquire()
+        assert clock.slept == [1]
+
+    run(main())
+
+
+def test_pause_blocks_for_flood_wait(clock):
+    async def main():
+        bucket = TokenBucket(rate=2, burst=5)
+        bucket.pause(10)
+        await bucket.acquire()
+        # bache hue tokens bhi gaye: poore 10 sec + ek token ka intezaar
+        assert clock.slept == [10.5]
+
+    run(main())
+
+
+def test_limiter_keys_and_disabled_rate(clock):
+    async def main():
+        limiter = RateLimiter()
+        for _ in range(5):
+            await limiter.wait("api", 0, 1)
+        assert limiter._buckets == {} and clock.slept == []
+        limiter.pause("missing", 30)  # bucket hi nahi: kuch nahi
+        await limiter.wait((0, 4), 1, 1)
+        await limiter.wait((1, 4), 1, 1)
+        assert clock.slept == []
+        limiter.pause((0, 4), 30)
+        await limiter.wait((1, 4), 1, 1)
+        await limiter.wait((0, 4), 1, 1)
+        # (1, 4) ka 1 sec (0, 4) ko bhi ek token de gaya
+        assert clock.slept == [1, 30]
+
+    run(main())
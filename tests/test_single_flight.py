@@ -0,0 +1,91 @@
+# tests/test_single_flight.py (concurrent fetches of the same key share one call)
+
+import asyncio
+
+import pytest
+
+from streaming.streamer import SingleFlight
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_callers_join_one_fetch():
+    async def main():
+        sf, calls = SingleFlight(), []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return b"part"
+
+        results = await asyncio.gather(*(sf.do("k", fetch) for _ in range(5)))
+        assert results == [b"part"] * 5
+        assert len(calls) == 1 and (sf.misses, sf.hits) == (1, 4)
+        # khatam hone ke baad naya call dobara upstream jaata hai
+        assert await sf.do("k", fetch) == b"part"
+        assert len(calls) == 2
+
+    run(main())
+
+
+def test_error_reaches_every_waiter():
+    async def main():
+        sf = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            raise OSError("boom")
+
+        results = await asyncio.gather(
+            sf.do("k", fetch), sf.do("k", fetch), return_exceptions=True
+        )
+        assert all(isinstance(r, OSError) for r in results)
+
+    run(main())
+
+
+def test_one_waiter_leaving_keeps_the_fetch():
+    async def main():
+        sf, done = SingleFlight(), asyncio.Event()
+
+        async def fetch():
+            await done.wait()
+            return b"part"
+
+        a = asyncio.ensure_future(sf.do("k", fetch))
+        b = asyncio.ensure_future(sf.do("k", fetch))
+        await asyncio.sleep(0)
+        a.cancel()
+        await asyncio.sleep(0)
+        done.set()
+        assert await b == b"part"
+        with pytest.raises(asyncio.CancelledError):
+            await a
+
+    run(main())
+
+
+def test_last_waiter_leaving_cancels_upstream():
+    async def main():
+        sf, state = SingleFlight(), {}
+
+        async def fetch():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                state["cancelled"] = True
+                raise
+
+        a = asyncio.ensure_future(sf.do("k", fetch))
+        b = asyncio.ensure_future(sf.do("k", fetch))
+        await asyncio.sleep(0)
+        a.cancel()
+        b.cancel()
+        await asyncio.gather(a, b, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert state.get("cancelled")
+        assert "k" not in sf._calls
+
+    run(main())
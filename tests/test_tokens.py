@@ -0,0 +1,76 @@
+# tests/test_tokens.py (signed links: round trip, tamper, expiry)
+
+import time
+
+import pytest
+
+from config import Config
+from streaming import tokens
+from streaming.tokens import HEAD, _b64, _mac, sign_link, verify_link
+
+
+@pytest.fixture(autouse=True)
+def secret(monkeypatch):
+    monkeypatch.setattr(Config, "LINK_SECRET", "test-secret")
+    monkeypatch.setattr(Config, "SIGNED_LINK_TTL", 0)
+
+
+def test_round_trip():
+    token = sign_link(42, "AgADxyz", 123456789, "video/x-matroska", "Movie.mkv", link_id="abc")
+    assert verify_link(token) == {
+        "mid": 42,
+        "file_unique_id": "AgADxyz",
+        "file_size": 123456789,
+        "mime_type": "video/x-matroska",
+        "file_name": "Movie.mkv",
+        "link_id": "abc",
+        "expires": 0,
+    }
+
+
+def test_literal_mime_and_unicode_name():
+    link = verify_link(sign_link(1, "U", 10, "video/x-msvideo", "ফাইল.avi"))
+    assert link["mime_type"] == "video/x-msvideo"
+    assert link["file_name"] == "ফাইল.avi"
+
+
+def test_tampered_token_rejected():
+    token = sign_link(42, "AgADxyz", 100, "video/mp4")
+    flipped = token[:10] + ("A" if token[10] != "A" else "B") + token[11:]
+    assert verify_link(flipped) is None
+    assert verify_link(token[:-2]) is None
+    assert verify_link("not-a-token!") is None
+
+
+def test_other_secret_rejected(monkeypatch):
+    token = sign_link(42, "AgADxyz", 100, "video/mp4")
+    monkeypatch.setattr(Config, "LINK_SECRET", "other")
+    assert verify_link(token) is None
+
+
+def test_expiry(monkeypatch):
+    token = sign_link(42, "AgADxyz", 100, "video/mp4", ttl=60)
+    assert verify_link(token)["expires"] > 0
+    now = time.time()
+    monkeypatch.setattr(tokens.time, "time", lambda: now + 61)
+    assert verify_link(token) is None
+
+
+def test_v1_token_still_valid():
+    payload = HEAD.pack(1, 7, 0, 100, 1) + bytes([3]) + b"UID" + b"old.mp4"
+    link = verify_link(_b64(payload + _mac(payload)))
+    assert link["mid"] == 7 and link["file_name"] == "old.mp4" and link["link_id"] == ""
+
+
+def test_long_non_ascii_name_is_capped():
+    name = "বাংলা_সিনেমা_" * 30 + ".mkv"
+    token = sign_link(42, "AgADxyz", 100, "video/x-matroska", name, link_id="abcdefghijk")
+    link = verify_link(token)
+    assert link is not None
+    assert len(link["file_name"].encode()) <= tokens.MAX_NAME_BYTES
+    assert link["file_name"].endswith(".mkv")
+    assert name.startswith(link["file_name"][:-4])
+
+
+def test_short_name_untouched():
+    assert verify_link(sign_link(1, "U", 10, "video/mp4", "a" * 200))["file_name"] == "a" * 200